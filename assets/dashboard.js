@@ -0,0 +1,102 @@
+// assets/dashboard.js
+// Rendu côté navigateur du mode CLIENTSIDE_METRICS (config.py) : le serveur
+// envoie une fois les quatre métriques de la période dans le dcc.Store
+// 'year-data', le changement de métrique redessine ici les graphiques sans
+// aller-retour serveur. Les figures reprennent celles de main.py.
+
+const METRIC_INFO = {
+    cases: {title: 'Cas totaux', scale: 'Blues', color: '#3498db'},
+    deaths: {title: 'Décès totaux', scale: 'Reds', color: '#e74c3c'},
+    recovered: {title: 'Rétablis', scale: 'Greens', color: '#2ecc71'},
+    active: {title: 'Cas actifs', scale: 'Oranges', color: '#f39c12'}
+};
+
+function formatNumber(x) {
+    return x.toLocaleString('en-US');
+}
+
+function worldMap(countries, metric, info) {
+    const customdata = countries.country.map((_, i) => [
+        countries.cases[i], countries.deaths[i], countries.recovered[i], countries.active[i]
+    ]);
+    return {
+        data: [{
+            type: 'choropleth',
+            locations: countries.iso3,
+            z: countries[metric],
+            text: countries.country,
+            customdata: customdata,
+            coloraxis: 'coloraxis',
+            hovertemplate: '<b>%{text}</b><br><br>cases=%{customdata[0]:,}<br>deaths=%{customdata[1]:,}' +
+                           '<br>recovered=%{customdata[2]:,}<br>active=%{customdata[3]:,}<extra></extra>'
+        }],
+        layout: {
+            coloraxis: {colorscale: info.scale, colorbar: {title: {text: info.title}}},
+            geo: {showframe: false, showcoastlines: true, projection: {type: 'natural earth'}, bgcolor: 'rgba(0,0,0,0)'},
+            margin: {l: 0, r: 0, t: 30, b: 0},
+            paper_bgcolor: 'white'
+        }
+    };
+}
+
+function barLayout(title, xTitle, yTitle) {
+    return {
+        title: {text: title, x: 0.5, xanchor: 'center', font: {size: 20}},
+        xaxis: {title: {text: xTitle}, gridcolor: '#e0e0e0'},
+        yaxis: {title: {text: yTitle}},
+        showlegend: false,
+        height: 500,
+        margin: {l: 150, r: 80, t: 60, b: 50},
+        plot_bgcolor: 'white',
+        paper_bgcolor: 'white'
+    };
+}
+
+function bar(x, y, values, info, orientation) {
+    return {
+        type: 'bar',
+        x: x,
+        y: y,
+        orientation: orientation,
+        marker: {color: values, colorscale: [[0, '#f0f0f0'], [1, info.color]], line: {color: info.color, width: 1}},
+        text: values.map(formatNumber),
+        textposition: 'outside'
+    };
+}
+
+function topCountries(top, info, label) {
+    // Classement top 20 précalculé côté serveur, déjà dans l'ordre croissant
+    return {
+        data: [bar(top.value, top.country, top.value, info, 'h')],
+        layout: barLayout(`Top 20 - ${info.title} - ${label}`, info.title, '')
+    };
+}
+
+function continentBar(continents, metric, info, label) {
+    const y = continents[metric];
+    return {
+        data: [bar(continents.continent, y, y, info, 'v')],
+        layout: barLayout(`${info.title} - ${label}`, 'Continent', info.title)
+    };
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    dashboard: {
+        renderMetric: function(data, metric) {
+            const empty = {data: [], layout: {}};
+            if (!data) {
+                return [empty, '', empty, empty];
+            }
+            const info = METRIC_INFO[metric] || METRIC_INFO.cases;
+            const countries = data.countries;
+            const top = data.top ? data.top[metric] || data.top.cases : null;
+            const continents = data.continents;
+            return [
+                countries ? worldMap(countries, metric, info) : empty,
+                data.date_text,
+                top ? topCountries(top, info, data.label) : empty,
+                continents ? continentBar(continents, metric, info, data.label) : empty
+            ];
+        }
+    }
+});
@@ -0,0 +1,312 @@
+# benchmarks/run_benchmarks.py
+"""
+Benchmarks du dashboard, hors réseau : le pipeline et les callbacks tournent
+contre le stub de benchmarks/stub_server.py, dans un dossier de travail
+temporaire (data/ du dépôt n'est pas touché).
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --users 1 8 32 --duration 10
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<ancien>.json
+
+Les résultats sont écrits dans benchmarks/results/<date>_<commit>.json pour
+comparer les commits entre eux.
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+METRICS = ["cases", "deaths", "recovered", "active", "new_cases_7d", "cases_growth", "cases_per_100k"]
+DASHBOARD_OUTPUT = "global-stats"  # sortie du callback serveur du dashboard, quel que soit le mode de rendu
+
+sys.path.insert(0, ROOT)
+from benchmarks.stub_server import start_stub  # noqa: E402
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def _summary(latencies):
+    """Médiane, p95 et max en millisecondes"""
+    if not latencies:
+        return {}
+    ordered = sorted(latencies)
+    return {
+        "median_ms": _ms(statistics.median(ordered)),
+        "p95_ms": _ms(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]),
+        "max_ms": _ms(ordered[-1]),
+    }
+
+
+def _stages(before, after):
+    """Temps passé par étape (src/utils/metrics.py) entre deux relevés"""
+    stages = {}
+    for (kind, name), (n, total) in after.items():
+        n0, total0 = before.get((kind, name), (0, 0))
+        if kind == "stage" and n > n0:
+            stages[name] = _ms(total - total0)
+    return stages
+
+
+def _run_pipeline():
+    from src.utils.historical import get_timeline_index
+    from src.utils.metrics import stage_totals
+    from src.utils.refresh import refresh_snapshot
+
+    before = stage_totals()
+    start = time.perf_counter()
+    refresh_snapshot()
+    get_timeline_index()
+    return {"total_ms": _ms(time.perf_counter() - start), "stages_ms": _stages(before, stage_totals())}
+
+
+def bench_pipeline(repeat):
+    """
+    get_data -> clean_data -> chargeurs -> agrégats -> index de la timeline :
+    à froid (dossier vide), à chaud (cache TTL valide) et à revalider
+    (TTL expiré, l'API répond 304).
+    """
+    cold = _run_pipeline()
+    warm = [_run_pipeline()["total_ms"] for _ in range(repeat)]
+
+    expired = []
+    for _ in range(repeat):
+        for folder in ("data/raw", "data/cleaned"):
+            for name in os.listdir(folder):
+                os.utime(os.path.join(folder, name), (0, 0))
+        expired.append(_run_pipeline()["total_ms"])
+
+    return {
+        "cold": cold,
+        "warm_median_ms": statistics.median(warm),
+        "revalidate_median_ms": statistics.median(expired),
+    }
+
+
+def _outputs(callback):
+    return callback["output"] if isinstance(callback["output"], list) else [callback["output"]]
+
+
+def _payload(app, values):
+    """
+    Requête /_dash-update-component du callback serveur du dashboard, choisi
+    par ses sorties : l'application enregistre d'autres callbacks (curseur de dates).
+    """
+    output_id, callback = next((output_id, callback) for output_id, callback in app.callback_map.items()
+                               if any(o.component_id == DASHBOARD_OUTPUT for o in _outputs(callback)))
+    outputs = _outputs(callback)
+    return {
+        "output": output_id,
+        "outputs": [{"id": o.component_id, "property": o.component_property} for o in outputs],
+        "inputs": [{**i, "value": values.get(i["id"])} for i in callback["inputs"]],
+        "changedPropIds": [f"{callback['inputs'][0]['id']}.{callback['inputs'][0]['property']}"],
+        "state": [{**s, "value": values.get(s["id"])} for s in callback.get("state", [])],
+    }
+
+
+def _periods(years, slider_max):
+    periods = [{"year-dropdown": year} for year in years]
+    periods += [{"year-dropdown": "date", "date-slider": day} for day in (0, slider_max // 2, slider_max)]
+    return periods
+
+
+def bench_callbacks(app, periods, repeat):
+    """Latence du callback pour chaque (période, métrique) : premier appel puis appels suivants"""
+    client = app.server.test_client()
+    results = []
+    for period in periods:
+        for metric in METRICS:
+            payload = _payload(app, {**period, "metric-dropdown": metric})
+            timings, size = [], 0
+            for _ in range(repeat + 1):
+                start = time.perf_counter()
+                response = client.post("/_dash-update-component", json=payload)
+                timings.append(time.perf_counter() - start)
+                size = len(response.data)
+                if response.status_code != 200:
+                    raise RuntimeError(f"Callback en erreur ({response.status_code}) pour {period} {metric}")
+            results.append({
+                "period": period.get("date-slider", period["year-dropdown"]),
+                "metric": metric,
+                "first_ms": _ms(timings[0]),
+                "warm_median_ms": _ms(statistics.median(timings[1:])),
+                "response_bytes": size,
+                "outputs": sorted(response.get_json()["response"]),
+            })
+    return results
+
+
+def bench_load(app, periods, users, duration):
+    """
+    N utilisateurs simulés (un thread et une connexion chacun) enchaînent
+    des interactions aléatoires contre le serveur HTTP réel pendant `duration` secondes.
+    """
+    import requests
+    from werkzeug.serving import make_server
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)  # pas une ligne de log par requête
+    server = make_server("127.0.0.1", 0, app.server, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/_dash-update-component"
+
+    results = []
+    try:
+        for n in users:
+            latencies, errors, transferred = [], [], []
+            lock = threading.Lock()
+            deadline = time.perf_counter() + duration
+
+            def user(seed):
+                # Comme un navigateur : l'état des figures affichées (figure-state) est renvoyé à chaque requête
+                rng = random.Random(seed)
+                session = requests.Session()
+                state = {}
+                while time.perf_counter() < deadline:
+                    payload = _payload(app, {**rng.choice(periods), "metric-dropdown": rng.choice(METRICS), **state})
+                    start = time.perf_counter()
+                    try:
+                        response = session.post(url, json=payload, timeout=60)
+                        ok = response.status_code == 200
+                    except requests.RequestException:
+                        ok = False
+                    latency = time.perf_counter() - start
+                    if ok:
+                        outputs = response.json().get("response", {})
+                        if "figure-state" in outputs:
+                            state = {"figure-state": outputs["figure-state"]["data"]}
+                    with lock:
+                        (latencies if ok else errors).append(latency)
+                        if ok:
+                            # octets sur le réseau (response.content est déjà décompressé)
+                            transferred.append(int(response.headers.get("Content-Length", len(response.content))))
+
+            threads = [threading.Thread(target=user, args=(seed,)) for seed in range(n)]
+            started = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - started
+            results.append({"users": n, "requests": len(latencies), "errors": len(errors),
+                            "throughput_rps": round(len(latencies) / elapsed, 1),
+                            "mean_response_bytes": round(statistics.mean(transferred)) if transferred else None,
+                            **_summary(latencies)})
+    finally:
+        server.shutdown()
+    return results
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _compare(current, previous_path):
+    """Écart relatif des indicateurs principaux avec un résultat précédent"""
+    with open(previous_path, "r", encoding="utf-8") as f:
+        previous = json.load(f)
+
+    def indicators(result):
+        values = {
+            "pipeline froid (ms)": result["pipeline"]["cold"]["total_ms"],
+            "pipeline chaud (ms)": result["pipeline"]["warm_median_ms"],
+            "pipeline revalidé (ms)": result["pipeline"]["revalidate_median_ms"],
+            "callback premier appel, médiane (ms)": statistics.median(c["first_ms"] for c in result["callbacks"]),
+            "callback à chaud, médiane (ms)": statistics.median(c["warm_median_ms"] for c in result["callbacks"]),
+        }
+        for load in result["load"]:
+            values[f"débit {load['users']} utilisateurs (req/s)"] = load["throughput_rps"]
+        return values
+
+    old = indicators(previous)
+    print(f"\nComparaison avec {previous['commit']} ({previous['date']}) :")
+    for name, value in indicators(current).items():
+        if name in old and old[name]:
+            print(f"  {name:45s} {old[name]:>10} -> {value:>10}  ({(value - old[name]) / old[name]:+.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks du dashboard COVID-19 (hors réseau)")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 4, 16], help="nombres d'utilisateurs simultanés")
+    parser.add_argument("--duration", type=float, default=5, help="durée de chaque palier de charge (s)")
+    parser.add_argument("--repeat", type=int, default=5, help="répétitions des mesures à chaud")
+    parser.add_argument("--output", help="fichier de résultats (défaut : benchmarks/results/<date>_<commit>.json)")
+    parser.add_argument("--compare", help="résultat précédent à comparer")
+    args = parser.parse_args()
+
+    stub, api, stub_url = start_stub()
+    os.environ["COVID_API_URL"] = stub_url  # lu par config.py : à définir avant tout import du projet
+
+    workdir = tempfile.mkdtemp(prefix="covid-bench-")
+    for folder in ("data/raw", "data/cleaned"):
+        os.makedirs(os.path.join(workdir, folder))
+    os.chdir(workdir)
+
+    try:
+        from config import HISTORICAL_YEARS
+
+        print("Pipeline...")
+        pipeline = bench_pipeline(args.repeat)
+        pipeline["api_calls"] = len(api.calls)
+
+        print("Callbacks...")
+        import main as dashboard
+        dashboard._data_ready.wait()
+        from src.utils.historical import get_timeline_index
+        index = get_timeline_index()
+        periods = _periods(HISTORICAL_YEARS + ["all"], len(index["dates"]) - 1 if index else 0)
+        callbacks = bench_callbacks(dashboard.app, periods, args.repeat)
+
+        print("Charge...")
+        load = bench_load(dashboard.app, periods, args.users, args.duration)
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+        stub.shutdown()
+
+    result = {
+        "commit": _commit(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "startup_seconds": round(dashboard.startup_seconds, 3),
+        "pipeline": pipeline,
+        "callbacks": callbacks,
+        "load": load,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.datetime.now():%Y%m%d-%H%M%S}_{result['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+    print(f"\nPipeline froid {pipeline['cold']['total_ms']} ms, chaud {pipeline['warm_median_ms']} ms, "
+          f"revalidé {pipeline['revalidate_median_ms']} ms")
+    print(f"Callbacks : médiane premier appel {statistics.median(c['first_ms'] for c in callbacks)} ms, "
+          f"à chaud {statistics.median(c['warm_median_ms'] for c in callbacks)} ms")
+    for row in load:
+        print(f"{row['users']:>3} utilisateurs : {row['throughput_rps']} req/s, "
+              f"médiane {row.get('median_ms')} ms, p95 {row.get('p95_ms')} ms, erreurs {row['errors']}")
+    print(f"Résultats : {output}")
+
+    if args.compare:
+        _compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# benchmarks/stub_server.py
+"""
+Serveur local qui imite disease.sh à partir de réponses enregistrées
+(data/raw/*.json), pour mesurer le dashboard sans réseau.
+
+    python benchmarks/stub_server.py --port 8765
+    COVID_API_URL=http://127.0.0.1:8765 python main.py
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_DIR = os.path.join(ROOT, "data", "raw")
+HISTORY_START = datetime.date(2020, 1, 22)
+
+
+def _load(name):
+    with open(os.path.join(RAW_DIR, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def synthetic_history(countries, end=None):
+    """
+    Historique reconstitué quand aucun historical_all.json n'a été enregistré :
+    pour chaque pays, une courbe cumulée croissante qui rejoint ses valeurs
+    actuelles à la date de fin. Déterministe, pour des mesures comparables.
+    """
+    end = end or datetime.date(2023, 3, 9)
+    days = (end - HISTORY_START).days + 1
+    keys = [f"{d.month}/{d.day}/{d:%y}" for d in (HISTORY_START + datetime.timedelta(i) for i in range(days))]
+    ramp = [((i + 1) / days) ** 2 for i in range(days)]
+    history = []
+    for entry in countries:
+        timeline = {m: {k: int((entry.get(m) or 0) * r) for k, r in zip(keys, ramp)}
+                    for m in ("cases", "deaths", "recovered")}
+        history.append({"country": entry["country"], "province": None, "timeline": timeline})
+    return history
+
+
+class RecordedApi:
+    """Réponses servies par le stub, encodées une fois avec leur ETag"""
+
+    def __init__(self):
+        self.countries = json.dumps(_load("rawdata.json")).encode()
+        path = os.path.join(RAW_DIR, "historical_all.json")
+        self.history = _load("historical_all.json") if os.path.exists(path) else synthetic_history(_load("rawdata.json"))
+        self.bodies = {}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def body(self, route, lastdays):
+        key = (route, lastdays)
+        with self.lock:
+            if key not in self.bodies:
+                if route == "countries":
+                    body = self.countries
+                elif lastdays == "all":
+                    body = json.dumps(self.history).encode()
+                else:
+                    n = int(lastdays)
+                    body = json.dumps([{**e, "timeline": {m: dict(list(v.items())[-n:]) for m, v in e["timeline"].items()}}
+                                       for e in self.history]).encode()
+                self.bodies[key] = (body, '"%s"' % hashlib.md5(body).hexdigest())
+            return self.bodies[key]
+
+
+def _handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=b"", etag=None):
+            self.send_response(status)
+            if etag:
+                self.send_header("ETag", etag)
+            if body:
+                self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            route = url.path.rstrip("/").rsplit("/", 1)[-1]
+            if route not in ("countries", "historical"):
+                return self._send(404)
+            lastdays = parse_qs(url.query).get("lastdays", ["all"])[0]
+            body, etag = api.body(route, lastdays)
+            not_modified = self.headers.get("If-None-Match") == etag
+            with api.lock:
+                api.calls.append((route, lastdays, not_modified))
+            if not_modified:
+                return self._send(304, etag=etag)
+            self._send(200, body, etag)
+
+    return Handler
+
+
+def start_stub(port=0):
+    """Démarre le stub dans un thread ; renvoie (serveur, api, url)"""
+    api = RecordedApi()
+    server = ThreadingHTTPServer(("127.0.0.1", port), _handler(api))
+    threading.Thread(target=server.serve_forever, name="api-stub", daemon=True).start()
+    return server, api, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub local de disease.sh")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    server, _, url = start_stub(args.port)
+    print(f"Stub disease.sh sur {url} (Ctrl+C pour arrêter)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
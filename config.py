@@ -1,6 +1,28 @@
 # config.py
+import os
+
+API_URL = os.environ.get("COVID_API_URL", "https://disease.sh")  # surchargeable (serveur local de test)
 CACHE_TTL_SECONDS = 24 * 60 * 60  # 24h (à ajuster)
-CLEAN_PATH = "data/cleaned/cleaneddata.csv"
-CLEAN_PATH_CONTINENTS = "data/cleaned/cleaneddata_continents.csv"
+HISTORICAL_INCREMENTAL_REFRESH = True  # à expiration, ne récupère que les jours manquants (lastdays=N)
+MEMORY_CACHE_SIZE = 16  # nombre de DataFrames (dataset, année) gardés en mémoire
+FIGURE_CACHE_WARMUP = False  # pré-calcule toutes les figures au lancement de main.py
+FIGURE_CACHE_SIZE = 256  # nombre maximal de figures gardées (années et dates du curseur)
+STARTUP_IN_BACKGROUND = True  # main.py sert la page tout de suite, le snapshot disque est chargé dans un thread
+STARTUP_BUDGET_SECONDS = 2.0  # au-delà, main.py signale un démarrage lent (import + création de l'app)
+STARTUP_DATA_TIMEOUT_SECONDS = 30  # attente maximale d'un callback arrivé avant le premier snapshot
+STARTUP_POLL_MS = 1000  # une page chargée avant les données revérifie à ce rythme pour activer le curseur de dates
+METRICS_ENDPOINT = "/metrics"  # durées, caches et tailles des réponses au format Prometheus (None pour désactiver)
+PROFILE_CALLBACKS = os.environ.get("COVID_PROFILE") == "1"  # un fichier cProfile par appel de callback
+PROFILE_DIR = "data/profiles"
+PAYLOAD_OPTIMIZATION = True  # réponses compressées (gzip/brotli), figures envoyées en Patch partiel, valeurs arrondies
+COMPRESS_MIN_BYTES = 1024  # en dessous, une réponse n'est pas compressée
+FIGURE_DECIMALS = 2  # décimales gardées pour les valeurs non entières des figures
+CLIENTSIDE_METRICS = False  # True : la période est envoyée une fois au navigateur, le changement de métrique est rendu en JS
+HISTORICAL_YEARS = [2020, 2021, 2022]
+REFRESH_INTERVAL_SECONDS = 10 * 60  # fréquence du rafraîchissement en arrière-plan (l'API n'est appelée qu'après le TTL)
+SHARED_SNAPSHOT = True  # un seul worker charge les données et les publie dans data/snapshot, les autres les mappent
+SNAPSHOT_POLL_SECONDS = 5  # fréquence à laquelle les autres workers vérifient la version publiée
+STORAGE_FORMAT = "feather"  # format des tables de data/cleaned : "feather" (colonnes, typé) ou "csv"
+CLEAN_PATH = "data/cleaned/cleaneddata"  # tables sans extension, ajoutée par src/utils/storage.py
+CLEAN_PATH_CONTINENTS = "data/cleaned/cleaneddata_continents"
 RAW_PATH = "data/raw/rawdata.json"
-RAW_PATH_CONTINENTS = "data/raw/rawdata_continents.json"
@@ -1,102 +1,296 @@
 # main.py
+import logging
+import threading
+import time
+
+_import_started = time.perf_counter()
+
 import dash
 from dash import dcc, html
-from dash.dependencies import Input, Output
-import plotly.express as px
+from dash.dependencies import ClientsideFunction, Input, Output, State
 import plotly.graph_objects as go
 
-from src.utils.data_loader import load_current_countries_data, load_current_continents_data, load_historical_year_data, export_continent_csv
+from config import (CLIENTSIDE_METRICS, FIGURE_CACHE_WARMUP, FIGURE_DECIMALS, HISTORICAL_YEARS, METRICS_ENDPOINT,
+                    PAYLOAD_OPTIMIZATION, STARTUP_BUDGET_SECONDS, STARTUP_DATA_TIMEOUT_SECONDS,
+                    STARTUP_IN_BACKGROUND, STARTUP_POLL_MS)
+from src.utils.figure_cache import get_cached_figure, get_or_build_figure
+from src.utils.metrics import instrument_callback, observe_response, render_metrics
+from src.utils.payload import compress_response, figure_patch, slim_values
+
+logger = logging.getLogger(__name__)
+
+# Démarrage rapide : pandas, numpy, pyarrow et la chaîne de données ne sont importés qu'au
+# premier usage (imports locaux), et le snapshot disque est chargé en arrière-plan.
+# Les callbacks ne lisent ensuite que des données déjà prêtes.
+_imports_done = threading.Event()
+_data_ready = threading.Event()
 
-# Charge une seule fois au démarrage (via cache TTL)
-df_countries = load_current_countries_data()
-df_continents = load_current_continents_data()
+def _start_data():
+    """Imports de la chaîne de données, snapshot disque puis rafraîchissement (API, cache TTL) en arrière-plan"""
+    try:
+        from src.utils.refresh import start_refresh_scheduler
+    finally:
+        _imports_done.set()
+    try:
+        start_refresh_scheduler()
+    finally:
+        _data_ready.set()
 
-app = dash.Dash(__name__)
-app.title = "COVID-19 Dashboard mondial"
+def _wait_for_imports():
+    """
+    Le sérialiseur JSON de plotly utilise pandas dès qu'il est dans sys.modules :
+    une requête ne doit pas le voir à moitié importé par le thread de démarrage.
+    N'attend que la fin des imports, jamais le chargement des données.
+    """
+    _imports_done.wait(STARTUP_DATA_TIMEOUT_SECONDS)
 
-app.layout = html.Div([
-    html.Div([
-        html.H1("Dashboard COVID-19 mondial",
-                style={'textAlign': 'center', 'color': '#2c3e50', 'marginBottom': 30}),
+def _wait_for_data():
+    """Un callback arrivé avant le premier snapshot l'attend (délai borné) plutôt que d'afficher du vide"""
+    _data_ready.wait(STARTUP_DATA_TIMEOUT_SECONDS)
 
+def _slider_props():
+    """
+    Bornes et repères du curseur de dates (un cran = un jour de la timeline indexée).
+    Curseur désactivé tant que les données ne sont pas chargées : la page n'attend pas,
+    enable_slider l'active ensuite.
+    """
+    if not _data_ready.is_set():
+        return {'min': 0, 'max': 0, 'value': 0, 'marks': {}, 'disabled': True}
+    from src.utils.historical import get_timeline_index
+    index = get_timeline_index()
+    if index is None:
+        return {'min': 0, 'max': 0, 'value': 0, 'marks': {}, 'disabled': True}
+    dates = index['dates']
+    marks = {i: str(d)[:7] for i, d in enumerate(dates) if str(d)[5:] in ('01-01', '07-01')}
+    return {'min': 0, 'max': len(dates) - 1, 'value': len(dates) - 1, 'marks': marks, 'disabled': False}
+
+def _metric_options():
+    """
+    Métriques cumulées, puis métriques dérivées de la timeline (rendu serveur
+    seulement : le mode CLIENTSIDE_METRICS ne reçoit que les cumuls)
+    """
+    options = [
+        {'label': 'Cas totaux', 'value': 'cases'},
+        {'label': 'Décès totaux', 'value': 'deaths'},
+        {'label': 'Rétablis', 'value': 'recovered'},
+        {'label': 'Cas actifs', 'value': 'active'}
+    ]
+    if not CLIENTSIDE_METRICS:
+        from src.utils.derived import DERIVED_METRICS
+        options += [{'label': info['title'], 'value': name} for name, info in DERIVED_METRICS.items()]
+    return options
+
+def serve_layout():
+    """Mise en page évaluée à chaque chargement de page (le curseur suit la timeline du moment)"""
+    slider = _slider_props()
+    return html.Div([
         html.Div([
+            html.H1("Dashboard COVID-19 mondial",
+                    style={'textAlign': 'center', 'color': '#2c3e50', 'marginBottom': 30}),
+
             html.Div([
-                html.Label("Sélectionner l'année :",
-                           style={'fontWeight': 'bold', 'fontSize': 16, 'marginBottom': 10}),
-                dcc.Dropdown(
-                    id='year-dropdown',
-                    options=[
-                        {'label': 'Année 2020', 'value': 2020},
-                        {'label': 'Année 2021', 'value': 2021},
-                        {'label': 'Année 2022', 'value': 2022},
-                        {'label': 'Données actuelles', 'value': 'all'}
-                    ],
-                    value='all',
-                    style={'width': '100%'}
-                )
-            ], style={'width': '30%', 'display': 'inline-block', 'paddingRight': '20px'}),
+                html.Div([
+                    html.Label("Sélectionner l'année :",
+                               style={'fontWeight': 'bold', 'fontSize': 16, 'marginBottom': 10}),
+                    dcc.Dropdown(
+                        id='year-dropdown',
+                        options=[
+                            {'label': 'Année 2020', 'value': 2020},
+                            {'label': 'Année 2021', 'value': 2021},
+                            {'label': 'Année 2022', 'value': 2022},
+                            {'label': 'Données actuelles', 'value': 'all'},
+                            {'label': 'Date du curseur', 'value': 'date'}
+                        ],
+                        value='all',
+                        style={'width': '100%'}
+                    )
+                ], style={'width': '30%', 'display': 'inline-block', 'paddingRight': '20px'}),
+
+                html.Div([
+                    html.Label("Métrique à afficher :",
+                               style={'fontWeight': 'bold', 'fontSize': 16, 'marginBottom': 10}),
+                    dcc.Dropdown(
+                        id='metric-dropdown',
+                        options=_metric_options(),
+                        value='cases',
+                        style={'width': '100%'}
+                    )
+                ], style={'width': '30%', 'display': 'inline-block', 'paddingLeft': '20px'})
+            ], style={'textAlign': 'center', 'marginBottom': 20}),
 
             html.Div([
-                html.Label("Métrique à afficher :",
+                html.Label("Date (option « Date du curseur ») :",
                            style={'fontWeight': 'bold', 'fontSize': 16, 'marginBottom': 10}),
-                dcc.Dropdown(
-                    id='metric-dropdown',
-                    options=[
-                        {'label': 'Cas totaux', 'value': 'cases'},
-                        {'label': 'Décès totaux', 'value': 'deaths'},
-                        {'label': 'Rétablis', 'value': 'recovered'},
-                        {'label': 'Cas actifs', 'value': 'active'}
-                    ],
-                    value='cases',
-                    style={'width': '100%'}
-                )
-            ], style={'width': '30%', 'display': 'inline-block', 'paddingLeft': '20px'})
-        ], style={'textAlign': 'center', 'marginBottom': 40}),
-
-        html.Div(id='global-stats', style={'textAlign': 'center', 'marginBottom': 30}),
+                dcc.Slider(id='date-slider', step=1, **slider),
+                # Tant que le curseur est désactivé, la page revérifie si les données sont prêtes
+                dcc.Interval(id='slider-poll', interval=STARTUP_POLL_MS, disabled=not slider['disabled'])
+            ], style={'width': '80%', 'margin': 'auto', 'marginBottom': 40}),
 
-        html.Div([
-            html.H2("Carte mondiale des cas", style={'textAlign': 'center'}),
-            html.P(id='map-date-info',
-                   style={'textAlign': 'center', 'fontSize': 14, 'color': '#7f8c8d', 'marginBottom': 20}),
-            dcc.Graph(id='world-map', style={'height': '600px'}, config={'displaylogo': False})
-        ], style={'marginBottom': 40}),
+            # Données compactes de la période (mode CLIENTSIDE_METRICS) : la métrique est rendue côté navigateur
+            dcc.Store(id='year-data'),
+            # Figure affichée par graphique (période, métrique, version) : les mises à jour suivantes sont des Patch
+            dcc.Store(id='figure-state'),
 
-        html.Div([
-            html.H2("Top 20 des pays les plus touchés", style={'textAlign': 'center'}),
-            dcc.Graph(id='top-countries-bar', style={'height': '500px'})
-        ]),
-        html.Div([
-            html.H2("Nombre de cas par continent", style={'textAlign': 'center'}),
-            dcc.Graph(id='continent-bar', style={'height': '500px'})
-        ])
-    ], style={'padding': '20px', 'fontFamily': 'Arial, sans-serif', 'maxWidth': '1400px', 'margin': 'auto'})
-])
+            html.Div(id='global-stats', style={'textAlign': 'center', 'marginBottom': 30}),
 
-def _get_df_for_year(selected_year):
-    if selected_year == 'all':
-        return df_countries
-    return load_historical_year_data(int(selected_year))
+            html.Div([
+                html.H2("Carte mondiale des cas", style={'textAlign': 'center'}),
+                html.P(id='map-date-info',
+                       style={'textAlign': 'center', 'fontSize': 14, 'color': '#7f8c8d', 'marginBottom': 20}),
+                dcc.Graph(id='world-map', style={'height': '600px'}, config={'displaylogo': False})
+            ], style={'marginBottom': 40}),
 
-def _get_df_for_year_per_continent(selected_year):
+            html.Div([
+                html.H2("Top 20 des pays les plus touchés", style={'textAlign': 'center'}),
+                dcc.Graph(id='top-countries-bar', style={'height': '500px'})
+            ]),
+            html.Div([
+                html.H2("Nombre de cas par continent", style={'textAlign': 'center'}),
+                dcc.Graph(id='continent-bar', style={'height': '500px'})
+            ])
+        ], style={'padding': '20px', 'fontFamily': 'Arial, sans-serif', 'maxWidth': '1400px', 'margin': 'auto'})
+    ])
+
+def _period(selected_year, selected_day):
+    """'all', une année (int) ou une date 'AAAA-MM-JJ' choisie au curseur"""
     if selected_year == 'all':
-        return df_continents
-    return export_continent_csv(int(selected_year))
-
-@app.callback(
-    Output('global-stats', 'children'),
-    [Input('year-dropdown', 'value'),
-     Input('metric-dropdown', 'value')]
-)
-def update_stats(selected_year, selected_metric):
-    df = _get_df_for_year(selected_year)
-    if df.empty:
+        return 'all'
+    if selected_year != 'date':
+        return int(selected_year)
+    from src.utils.historical import get_timeline_index
+    index = get_timeline_index()
+    if index is None:
+        return None
+    dates = index['dates']
+    return str(dates[min(int(selected_day or 0), len(dates) - 1)])
+
+def _is_date(period):
+    return isinstance(period, str) and period != 'all'
+
+def _timeline_date(period):
+    """
+    Date de la timeline indexée correspondant à une période : dernier jour
+    disponible pour 'all', dernier jour de l'année sinon. Les métriques
+    dérivées n'existent que dans l'index de la timeline.
+    """
+    from src.utils.historical import get_timeline_index
+    from src.utils.timeline_index import date_position
+
+    index = get_timeline_index()
+    if index is None:
+        return None
+    j = date_position(index, index['dates'][-1] if period == 'all' else f"{period}-12-31")
+    return str(index['dates'][j]) if j >= 0 else None
+
+def _is_derived(metric):
+    from src.utils.derived import DERIVED_METRICS
+    return metric in DERIVED_METRICS
+
+def _metric_info(metric_info, selected_metric):
+    """Libellé et couleurs d'une métrique ; une métrique dérivée reprend les couleurs de sa métrique de base"""
+    from src.utils.derived import DERIVED_METRICS
+
+    derived = DERIVED_METRICS.get(selected_metric)
+    if derived is None:
+        return metric_info.get(selected_metric, metric_info['cases'])
+    return {**metric_info[derived['base']], 'title': derived['title']}
+
+def _value_format(selected_metric):
+    """Format d3 des valeurs affichées : entiers avec séparateur de milliers, décimales pour les dérivées"""
+    return f",.{FIGURE_DECIMALS}f" if _is_derived(selected_metric) else ","
+
+def _period_label(period):
+    if period == 'all':
+        return "Actuelles"
+    if _is_date(period):
+        return f"{period[8:]}/{period[5:7]}/{period[:4]}"
+    return str(period)
+
+def _period_data(period, derived=()):
+    """
+    (version, pays, cube d'agrégats) de la période, lus en une seule fois : un
+    rafraîchissement concurrent ne peut pas mélanger deux versions dans un même
+    callback (figures, cache et Patch utilisent tous cette version).
+    """
+    import pandas as pd
+    from src.utils.historical import get_timeline_index
+    from src.utils.refresh import get_period
+    from src.utils.timeline_index import countries_at, cube_at
+
+    if period is None:
+        return None, pd.DataFrame(), None
+    if _is_date(period):
+        # Lecture dans l'index précalculé : ni réseau ni fichier par cran du curseur
+        index = get_timeline_index()
+        if index is None:
+            return None, pd.DataFrame(), None
+        return index['version'], countries_at(index, period, derived), cube_at(index, period, derived)
+    return get_period(period)
+
+def update_dashboard(selected_year, selected_metric, selected_day=None, figure_state=None):
+    """
+    Callback unique : la période et les données sont résolues une seule fois
+    par interaction, puis tous les éléments sont renvoyés ensemble.
+    """
+    _wait_for_data()
+    period = _period(selected_year, selected_day)
+    derived = [selected_metric] if _is_derived(selected_metric) else []
+    if derived and period is not None and not _is_date(period):
+        period = _timeline_date(period)
+    version, df, cube = _period_data(period, derived)
+
+    world_map, date_text = _world_map(period, version, df, selected_metric)
+    if cube is None:
+        figures = {'world-map': world_map, 'top-countries-bar': go.Figure(), 'continent-bar': go.Figure()}
+    else:
+        figures = {
+            'world-map': world_map,
+            'top-countries-bar': _top_countries_bar(period, version,
+                                                    cube['top'].get(selected_metric, cube['top']['cases']),
+                                                    selected_metric),
+            'continent-bar': _continent_bar(period, version, cube['continents'], selected_metric)
+        }
+    sent, state = _send_figures(figures, period, version, selected_metric, figure_state or {})
+    return (
+        _stats(cube['totals'] if cube is not None else None),
+        sent['world-map'],
+        date_text,
+        sent['top-countries-bar'],
+        sent['continent-bar'],
+        state
+    )
+
+def _send_figures(figures, period, version, selected_metric, figure_state):
+    """
+    Mode PAYLOAD_OPTIMIZATION : chaque figure est comparée à celle que le
+    navigateur affiche déjà (retrouvée dans le cache de figures grâce à
+    figure_state) ; rien n'est renvoyé si elle est identique, un Patch des
+    seules parties modifiées sinon.
+    """
+    sent, state = {}, {}
+    for chart, figure in figures.items():
+        if not isinstance(figure, dict):  # figure vide : rien à comparer
+            sent[chart], state[chart] = figure, None
+            continue
+        shown = [period, selected_metric, version]
+        previous = figure_state.get(chart)
+        state[chart] = shown
+        if not PAYLOAD_OPTIMIZATION or previous is None:
+            sent[chart] = figure
+        elif previous == shown:
+            sent[chart] = dash.no_update
+        else:
+            sent[chart] = figure_patch(get_cached_figure(chart, *previous), figure)
+    return sent, state
+
+def _stats(totals):
+    if totals is None:
         return html.Div("Aucune donnée disponible")
 
-    total_cases = int(df['cases'].sum())
-    total_deaths = int(df['deaths'].sum())
-    total_recovered = int(df['recovered'].sum())
-    total_active = int(df['active'].sum())
+    total_cases = totals['cases']
+    total_deaths = totals['deaths']
+    total_recovered = totals['recovered']
+    total_active = totals['active']
 
     return html.Div([
         html.Div([
@@ -116,77 +310,112 @@ def update_stats(selected_year, selected_metric):
                   'boxShadow': '0 2px 4px rgba(0,0,0,0.1)'})
     ])
 
-@app.callback(
-    [Output('world-map', 'figure'),
-     Output('map-date-info', 'children')],
-    [Input('year-dropdown', 'value'),
-     Input('metric-dropdown', 'value')]
-)
-def update_world_map(selected_year, selected_metric):
-    df = _get_df_for_year(selected_year)
-    date_text = "Données actuelles (dernières disponibles)" if selected_year == 'all' else f"Données au 31 décembre {selected_year}"
+def update_year_data(selected_year, selected_day=None):
+    """
+    Mode CLIENTSIDE_METRICS : seul un changement de période passe par le
+    serveur. Il renvoie les cartes de stats et, une fois, les quatre
+    métriques de la période avec leurs classements top 20 précalculés ;
+    assets/dashboard.js redessine ensuite les graphiques localement à chaque
+    changement de métrique.
+    """
+    _wait_for_data()
+    period = _period(selected_year, selected_day)
+    _, df, cube = _period_data(period)
+    df_continents = cube['continents'] if cube is not None else None
+
+    columns = ['cases', 'deaths', 'recovered', 'active']
+    data = {
+        'label': _period_label(period) if period is not None else "",
+        'date_text': _date_text(period) if not df.empty else "Aucune donnée disponible pour cette période",
+        'countries': {c: df[c].tolist() for c in ['country', 'iso3'] + columns} if not df.empty else None,
+        'top': {m: {'country': top['country'].tolist(), 'value': top[m].tolist()}
+                for m, top in cube['top'].items()} if cube is not None else None,
+        'continents': {c: df_continents[c].tolist() for c in ['continent'] + columns}
+                       if df_continents is not None and not df_continents.empty else None
+    }
+    return data, _stats(cube['totals'] if cube is not None else None)
+
+def _date_text(period):
+    if period == 'all':
+        return "Données actuelles (dernières disponibles)"
+    if _is_date(period):
+        return f"Données au {_period_label(period)}"
+    return f"Données au 31 décembre {period}"
+
+def _world_map(period, version, df, selected_metric):
+    date_text = _date_text(period)
 
     if df.empty:
         return go.Figure(), "Aucune donnée disponible pour cette période"
 
+    fig = get_or_build_figure('world-map', period, selected_metric, version,
+                              lambda: _build_world_map(df, selected_metric))
+    return fig, date_text
+
+def _build_world_map(df, selected_metric):
+    import numpy as np
+
     metric_info = {
         'cases': {'title': 'Cas totaux', 'color': 'Blues'},
         'deaths': {'title': 'Décès totaux', 'color': 'Reds'},
         'recovered': {'title': 'Rétablis', 'color': 'Greens'},
         'active': {'title': 'Cas actifs', 'color': 'Oranges'}
     }
-    info = metric_info.get(selected_metric, metric_info['cases'])
-
-    fig = px.choropleth(
-        df,
-        locations="iso3",
-        color=selected_metric,
-        hover_name="country",
-        hover_data={'cases': ':,', 'deaths': ':,', 'recovered': ':,', 'active': ':,', 'iso3': False},
-        color_continuous_scale=info['color'],
-        labels={selected_metric: info['title']}
-    )
+    info = _metric_info(metric_info, selected_metric)
+
+    # Les quatre métriques en un tableau numérique (customdata) et un hovertemplate
+    # commun : d'une métrique cumulée à l'autre, seule la couleur (z) change
+    metrics = ['cases', 'deaths', 'recovered', 'active']
+    selected = f"{info['title']}=%{{z:{_value_format(selected_metric)}}}<br>" if _is_derived(selected_metric) else ''
+    fig = go.Figure(go.Choropleth(
+        locations=df['iso3'].astype(str),
+        z=slim_values(df[selected_metric]),
+        hovertext=df['country'].astype(str),
+        customdata=np.column_stack([slim_values(df[m]).to_numpy() for m in metrics]),
+        hovertemplate='<b>%{hovertext}</b><br><br>' + selected +
+                      '<br>'.join(f"{m}=%{{customdata[{i}]:,}}" for i, m in enumerate(metrics)) +
+                      '<extra></extra>',
+        coloraxis='coloraxis'
+    ))
     fig.update_layout(
+        coloraxis=dict(colorscale=info['color'], colorbar=dict(title=dict(text=info['title']))),
         geo=dict(showframe=False, showcoastlines=True, projection_type='natural earth', bgcolor='rgba(0,0,0,0)'),
         margin=dict(l=0, r=0, t=30, b=0),
         paper_bgcolor='white'
     )
-    return fig, date_text
+    return fig
 
-@app.callback(
-    Output('top-countries-bar', 'figure'),
-    [Input('year-dropdown', 'value'),
-     Input('metric-dropdown', 'value')]
-)
-def update_bar_chart(selected_year, selected_metric):
-    df = _get_df_for_year(selected_year)
-    if df.empty:
+def _top_countries_bar(period, version, df_top, selected_metric):
+    if df_top.empty:
         return go.Figure()
 
+    return get_or_build_figure('top-countries-bar', period, selected_metric, version,
+                               lambda: _build_bar_chart(df_top, period, selected_metric))
+
+def _build_bar_chart(df_top, period, selected_metric):
     metric_info = {
         'cases': {'title': 'Cas totaux', 'color': '#3498db'},
         'deaths': {'title': 'Décès totaux', 'color': '#e74c3c'},
         'recovered': {'title': 'Rétablis', 'color': '#2ecc71'},
         'active': {'title': 'Cas actifs', 'color': '#f39c12'}
     }
-    info = metric_info.get(selected_metric, metric_info['cases'])
-
-    df_top = df.nlargest(20, selected_metric).sort_values(selected_metric)
+    info = _metric_info(metric_info, selected_metric)
 
+    # df_top : classement top 20 déjà trié par ordre croissant (cube d'agrégats)
     fig = go.Figure(data=[
         go.Bar(
-            x=df_top[selected_metric],
-            y=df_top['country'],
+            x=slim_values(df_top[selected_metric]),
+            y=df_top['country'].astype(str),
             orientation='h',
-            marker=dict(color=df_top[selected_metric],
+            marker=dict(color=slim_values(df_top[selected_metric]),
                         colorscale=[[0, '#f0f0f0'], [1, info['color']]],
                         line=dict(color=info['color'], width=1)),
-            text=df_top[selected_metric].apply(lambda x: f"{x:,}"),
+            texttemplate=f"%{{x:{_value_format(selected_metric)}}}",  # formaté par plotly.js
             textposition='outside'
         )
     ])
 
-    year_text = f" - {selected_year}" if selected_year != 'all' else " - Actuelles"
+    year_text = f" - {_period_label(period)}"
     fig.update_layout(
         title={'text': f"Top 20 - {info['title']}{year_text}", 'x': 0.5, 'xanchor': 'center', 'font': {'size': 20}},
         xaxis_title=info['title'],
@@ -201,38 +430,36 @@ def update_bar_chart(selected_year, selected_metric):
     return fig
 
 #Histogramme par continent
-@app.callback(
-    Output('continent-bar', 'figure'),
-    [Input('year-dropdown', 'value'),
-     Input('metric-dropdown', 'value')]
-)
-def update_bar_chart_continent(selected_year, selected_metric):
-    df = _get_df_for_year_per_continent(selected_year)
+def _continent_bar(period, version, df, selected_metric):
     if df.empty:
         return go.Figure()
 
+    return get_or_build_figure('continent-bar', period, selected_metric, version,
+                               lambda: _build_bar_chart_continent(df, period, selected_metric))
+
+def _build_bar_chart_continent(df, period, selected_metric):
     metric_info = {
         'cases': {'title': 'Cas totaux', 'color': '#3498db'},
         'deaths': {'title': 'Décès totaux', 'color': '#e74c3c'},
         'recovered': {'title': 'Rétablis', 'color': '#2ecc71'},
         'active': {'title': 'Cas actifs', 'color': '#f39c12'}
     }
-    info = metric_info.get(selected_metric, metric_info['cases'])
+    info = _metric_info(metric_info, selected_metric)
     # Création de la figure
     fig = go.Figure(
         data = [
             go.Bar(
-                x=df['continent'],
-                y=df[selected_metric],
-                marker=dict(color=df[selected_metric],
+                x=df['continent'].astype(str),
+                y=slim_values(df[selected_metric]),
+                marker=dict(color=slim_values(df[selected_metric]),
                             colorscale=[[0, '#f0f0f0'], [1, info['color']]],
                             line=dict(color=info['color'], width=1)),
-                text=df[selected_metric].apply(lambda x: f"{x:,}"),
+                texttemplate=f"%{{y:{_value_format(selected_metric)}}}",
                 textposition='outside'
             )
         ]
     )
-    year_text = f" - {selected_year}" if selected_year != 'all' else " - Actuelles"
+    year_text = f" - {_period_label(period)}"
     # Mise en forme
     fig.update_layout(
         title={'text': f"{info['title']}{year_text}", 'x': 0.5, 'xanchor': 'center', 'font': {'size': 20}},
@@ -247,6 +474,100 @@ def update_bar_chart_continent(selected_year, selected_metric):
     )
     return fig
 
+def enable_slider(_):
+    """Active le curseur de dates dès que la timeline est indexée, puis arrête l'interrogation"""
+    props = _slider_props()
+    if props['disabled']:
+        return (dash.no_update,) * 5 + (False,)
+    return props['min'], props['max'], props['value'], props['marks'], False, True
+
+def _register_callbacks(app):
+    app.callback(
+        [Output('date-slider', 'min'),
+         Output('date-slider', 'max'),
+         Output('date-slider', 'value'),
+         Output('date-slider', 'marks'),
+         Output('date-slider', 'disabled'),
+         Output('slider-poll', 'disabled')],
+        [Input('slider-poll', 'n_intervals')],
+        prevent_initial_call=True
+    )(instrument_callback(enable_slider))
+
+    if CLIENTSIDE_METRICS:
+        app.callback(
+            [Output('year-data', 'data'),
+             Output('global-stats', 'children')],
+            [Input('year-dropdown', 'value'),
+             Input('date-slider', 'value')]
+        )(instrument_callback(update_year_data))
+
+        app.clientside_callback(
+            ClientsideFunction(namespace='dashboard', function_name='renderMetric'),
+            [Output('world-map', 'figure'),
+             Output('map-date-info', 'children'),
+             Output('top-countries-bar', 'figure'),
+             Output('continent-bar', 'figure')],
+            [Input('year-data', 'data'),
+             Input('metric-dropdown', 'value')]
+        )
+    else:
+        app.callback(
+            [Output('global-stats', 'children'),
+             Output('world-map', 'figure'),
+             Output('map-date-info', 'children'),
+             Output('top-countries-bar', 'figure'),
+             Output('continent-bar', 'figure'),
+             Output('figure-state', 'data')],
+            [Input('year-dropdown', 'value'),
+             Input('metric-dropdown', 'value'),
+             Input('date-slider', 'value')],
+            [State('figure-state', 'data')]
+        )(instrument_callback(update_dashboard))
+
+def _metrics_view():
+    """Mesures du processus (durées, caches, tailles des réponses) au format texte Prometheus"""
+    return render_metrics(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+def create_app(background=STARTUP_IN_BACKGROUND):
+    """
+    Fabrique de l'application : mise en page et callbacks sont prêts tout de
+    suite, les données sont chargées dans un thread (ou avant de rendre la
+    main si background=False). Le serveur peut répondre dès le retour.
+    """
+    app = dash.Dash(__name__)
+    app.title = "COVID-19 Dashboard mondial"
+    app.layout = serve_layout
+    app.server.before_request(_wait_for_imports)
+    if METRICS_ENDPOINT:
+        app.server.after_request(observe_response)  # enregistré en premier : mesure après la compression
+        app.server.add_url_rule(METRICS_ENDPOINT, 'metrics', _metrics_view)
+    if PAYLOAD_OPTIMIZATION:
+        app.server.after_request(compress_response)
+    _register_callbacks(app)
+
+    if background:
+        threading.Thread(target=_start_data, name="data-startup", daemon=True).start()
+    else:
+        _start_data()
+    return app
+
+def warm_figure_cache():
+    """Pré-calcule toutes les figures (années × métriques) pour que les premières vues soient instantanées"""
+    for year in HISTORICAL_YEARS + ['all']:
+        for metric in ['cases', 'deaths', 'recovered', 'active']:
+            update_dashboard(year, metric)
+
+app = create_app()
+server = app.server  # point d'entrée WSGI (gunicorn main:server)
+
+# Budget de démarrage : temps entre le début de l'import de main.py et une application prête à servir
+startup_seconds = time.perf_counter() - _import_started
+if startup_seconds > STARTUP_BUDGET_SECONDS:
+    logger.warning("Démarrage lent : %.2f s (budget %s s)", startup_seconds, STARTUP_BUDGET_SECONDS)
+
 
 if __name__ == '__main__':
+    print(f"Application prête en {startup_seconds:.2f} s")
+    if FIGURE_CACHE_WARMUP:
+        warm_figure_cache()
     app.run(debug=True, port=8050, use_reloader=False)
@@ -0,0 +1,54 @@
+# src/utils/aggregates.py
+import numpy as np
+import pandas as pd
+
+from src.utils.schema import compact
+
+METRICS = ["cases", "deaths", "recovered", "active"]
+TOP_N = 20
+
+
+def region_rollup(df_countries, mapping, region="continent"):
+    """
+    Somme des métriques par région à partir de la table pays.
+    mapping associe chaque pays à sa région (colonne `region` : continent ou
+    tout regroupement personnalisé). Les pays sont codés une fois en
+    catégories, puis chaque métrique est sommée par np.bincount : même code
+    pour les données actuelles et les années historiques.
+    Les pays sans région (navires, noms inconnus) sont ignorés.
+    """
+    if df_countries.empty or mapping.empty:
+        return pd.DataFrame()
+    mapping = mapping.drop_duplicates("country")
+    regions = pd.Categorical(mapping[region])
+    codes = pd.Categorical(df_countries["country"], categories=mapping["country"]).codes
+    region_codes = np.where(codes >= 0, regions.codes[codes], -1)
+    keep = region_codes >= 0
+
+    df = pd.DataFrame({region: regions.categories.astype(str)})
+    for m in METRICS:
+        values = df_countries[m].to_numpy()[keep]
+        df[m] = np.bincount(region_codes[keep], weights=values, minlength=len(df)).astype(np.int64)
+    return compact(df)
+
+
+def top_ranking(df, metric, n=TOP_N):
+    """Les n pays les plus touchés, triés par ordre croissant (prêts pour un histogramme horizontal)"""
+    values = df[metric].to_numpy()
+    rows = np.argsort(-values, kind="stable")[:n][::-1]
+    return df.iloc[rows][["country", metric]].reset_index(drop=True)
+
+
+def build_cube(df_countries, df_continents):
+    """
+    Agrégats matérialisés d'une période, calculés au rafraîchissement des
+    données : totaux mondiaux, classements top N par métrique et sommes par
+    continent. Les callbacks n'ont plus qu'à les lire.
+    """
+    if df_countries.empty:
+        return None
+    return {
+        "totals": {m: int(df_countries[m].sum()) for m in METRICS},
+        "top": {m: top_ranking(df_countries, m) for m in METRICS},
+        "continents": df_continents,
+    }
@@ -1,5 +1,13 @@
 import os
+import tempfile
 import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 def is_cache_valid(filepath: str, ttl_seconds: int) -> bool:
     """Retourne True si le fichier existe et est plus récent que ttl_seconds."""
@@ -7,3 +15,63 @@ def is_cache_valid(filepath: str, ttl_seconds: int) -> bool:
         return False
     age_seconds = time.time() - os.path.getmtime(filepath)
     return age_seconds < ttl_seconds
+
+@contextmanager
+def file_lock(path: str):
+    """
+    Verrou exclusif inter-processus (fichier <path>.lock).
+    Les autres workers attendent que le premier ait terminé son rafraîchissement.
+    """
+    lock_path = path + ".lock"
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    with open(lock_path, "a+") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def try_file_lock(path: str):
+    """
+    Prend le verrou <path>.lock sans attendre. Renvoie le fichier ouvert, à
+    garder tant que le verrou doit être tenu, ou None s'il est déjà pris.
+    """
+    lock_path = path + ".lock"
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    f = open(lock_path, "a+")
+    try:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+@contextmanager
+def atomic_path(path: str):
+    """
+    Fournit un fichier temporaire dans le même dossier que path, renommé
+    atomiquement en path à la sortie : un lecteur ne voit jamais de fichier à moitié écrit.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,126 @@
+# src/utils/country_reference.py
+import os
+import threading
+
+import pandas as pd
+
+from src.utils.json_stream import read_json_columns
+from src.utils.schema import compact
+from src.utils.storage import read_table, table_exists, table_path, write_table
+
+RAW_PATH = os.path.join("data", "raw", "rawdata.json")
+REFERENCE_PATH = os.path.join("data", "cleaned", "country_reference")
+REFERENCE_COLUMNS = ["country", "iso2", "iso3", "lat", "long", "continent", "population"]
+COUNTRY_INFO = ["iso2", "iso3", "lat", "long"]
+
+# Autres noms d'un même pays (timeline historique, graphies courantes) -> nom utilisé par /countries
+COUNTRY_ALIASES = {
+    "US": "USA", "United States": "USA",
+    "United Kingdom": "UK",
+    "South Korea": "S. Korea", "Korea, South": "S. Korea",
+    "North Korea": "N. Korea", "Korea, North": "N. Korea",
+    "Libya": "Libyan Arab Jamahiriya",
+    "North Macedonia": "Macedonia",
+    "Ivory Coast": "Côte d'Ivoire", "Cote d'Ivoire": "Côte d'Ivoire",
+    "Syria": "Syrian Arab Republic",
+    "Laos": "Lao People's Democratic Republic",
+    "Eswatini": "Swaziland",
+    "Burma": "Myanmar",
+    "Holy See": "Holy See (Vatican City State)", "Vatican City": "Holy See (Vatican City State)",
+    "West Bank and Gaza": "Palestine",
+    "Taiwan*": "Taiwan",
+    "Congo (Kinshasa)": "DRC", "Democratic Republic of the Congo": "DRC",
+    "Congo (Brazzaville)": "Congo", "Republic of the Congo": "Congo",
+    "Cape Verde": "Cabo Verde",
+    "Czech Republic": "Czechia",
+    "East Timor": "Timor-Leste",
+    "Macau": "Macao",
+    "United Arab Emirates": "UAE",
+    "Bosnia and Herzegovina": "Bosnia",
+    "Falkland Islands": "Falkland Islands (Malvinas)",
+    "Saint Pierre and Miquelon": "Saint Pierre Miquelon",
+    "Saint Barthelemy": "St. Barth",
+    "Reunion": "Réunion",
+    "Curacao": "Curaçao",
+    "Micronesia (Federated States of)": "Micronesia",
+}
+
+# Dernière référence lue : {"mtime": float, "reference": DataFrame indexé par nom}
+_memo = {}
+_lock = threading.Lock()
+
+
+def build_country_reference(df_raw):
+    """
+    Construit la table de référence des pays à partir de la réponse
+    /countries déjà mise à plat (country, continent, population et les champs
+    COUNTRY_INFO de countryInfo), complétée par COUNTRY_ALIASES. Une ligne par
+    nom connu, canonique ou alias.
+    """
+    ref = df_raw[["country"] + COUNTRY_INFO].copy()
+    ref["continent"] = df_raw["continent"].replace("", None) if "continent" in df_raw else None
+    ref["population"] = pd.to_numeric(df_raw["population"], errors="coerce") if "population" in df_raw else None
+    ref = ref[ref["iso3"].notna()].drop_duplicates("country")
+
+    aliases = pd.DataFrame({"name": list(COUNTRY_ALIASES), "country": list(COUNTRY_ALIASES.values())})
+    aliases = aliases.merge(ref, on="country")  # seulement les alias d'un pays connu
+    table = pd.concat([ref.assign(name=ref["country"]), aliases], ignore_index=True)
+    table = table.drop_duplicates("name")[["name"] + REFERENCE_COLUMNS]
+
+    os.makedirs(os.path.dirname(REFERENCE_PATH), exist_ok=True)
+    write_table(compact(table), REFERENCE_PATH)
+    return REFERENCE_PATH
+
+
+def get_country_reference() -> pd.DataFrame:
+    """
+    Référence indexée par nom (canonique ou alias), construite depuis
+    rawdata.json si absente et relue seulement quand le fichier change.
+    """
+    if not table_exists(REFERENCE_PATH):
+        build_country_reference(read_json_columns(RAW_PATH, ["country", "continent", "population"],
+                                                  nested={"countryInfo": COUNTRY_INFO}))
+    mtime = os.path.getmtime(table_path(REFERENCE_PATH))
+    with _lock:
+        if _memo.get("mtime") != mtime:
+            reference = read_table(REFERENCE_PATH)
+            reference["name"] = reference["name"].astype(str)
+            _memo.update(mtime=mtime, reference=reference.set_index("name"))
+        return _memo["reference"]
+
+
+def resolve_countries(df, columns=("iso3",), reference=None) -> pd.DataFrame:
+    """
+    Résout la colonne country de df en une seule recherche indexée :
+    le nom devient le nom canonique et les colonnes demandées de la
+    référence sont ajoutées. Les noms inconnus (navires...) sont écartés.
+    """
+    reference = get_country_reference() if reference is None else reference
+    pos = reference.index.get_indexer(df["country"].astype(str))
+    found = pos >= 0
+    df = df[found].copy()
+    df["country"] = reference["country"].to_numpy()[pos[found]]
+    for col in columns:
+        df[col] = reference[col].to_numpy()[pos[found]]
+    return compact(df)
+
+
+def sum_by_country(df, metrics) -> pd.DataFrame:
+    """
+    Une ligne par pays canonique (même regroupement que l'index de la timeline) :
+    les lignes d'un pays déjà résolues par resolve_countries, ses provinces,
+    sont sommées sur `metrics` ; les autres colonnes gardent la première valeur.
+    """
+    if df.empty or df["country"].is_unique:
+        return df
+    grouped = df.groupby("country", sort=False, observed=True)
+    others = [c for c in df.columns if c != "country" and c not in metrics]
+    out = grouped[metrics].sum().join(grouped[others].first()).reset_index()
+    return compact(out[df.columns])
+
+
+def country_continent() -> pd.DataFrame:
+    """Table nom -> continent (alias compris) utilisée par les agrégats par continent"""
+    reference = get_country_reference()
+    mapping = pd.DataFrame({"country": reference.index, "continent": reference["continent"].to_numpy()})
+    return mapping[mapping["continent"].notna()].reset_index(drop=True)
@@ -1,72 +1,175 @@
 # src/utils/data_loader.py
 import os
+import threading
+from collections import OrderedDict
+
 import pandas as pd
 
-from config import CACHE_TTL_SECONDS, CLEAN_PATH, CLEAN_PATH_CONTINENTS
-from src.utils.get_data import get_data, get_data_continents
-from src.utils.clean_data import clean_data, clean_data_continents, get_country_continent_csv
-from src.utils.common_functions import is_cache_valid
+from config import CACHE_TTL_SECONDS, CLEAN_PATH, CLEAN_PATH_CONTINENTS, MEMORY_CACHE_SIZE
+from src.utils.aggregates import region_rollup
+from src.utils.get_data import get_data
+from src.utils.clean_data import clean_data
+from src.utils.country_reference import country_continent
+from src.utils.common_functions import file_lock, is_cache_valid
+from src.utils.metrics import count_cache
+from src.utils.storage import read_table, table_path, write_table
+
+# Cache mémoire LRU devant le cache disque : (dataset, année) -> (mtime du fichier, DataFrame)
+# Les DataFrames renvoyés sont partagés entre callbacks : ne pas les modifier en place.
+_memory_cache = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def _remember(dataset, year, name, df):
+    """Range df dans le cache mémoire avec le mtime courant du fichier comme version"""
+    with _memory_lock:
+        _memory_cache[(dataset, year)] = (os.path.getmtime(table_path(name)), df)
+        _memory_cache.move_to_end((dataset, year))
+        while len(_memory_cache) > MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+    return df
+
+
+def _read_cached(dataset, year, name):
+    """
+    Lit une table du cache disque en passant par le cache mémoire.
+    Le fichier n'est relu que si son mtime a changé depuis la dernière lecture.
+    """
+    key = (dataset, year)
+    mtime = os.path.getmtime(table_path(name))
+    with _memory_lock:
+        hit = _memory_cache.get(key)
+        if hit is not None and hit[0] == mtime:
+            _memory_cache.move_to_end(key)
+            count_cache("memory", "hit")
+            return hit[1]
+    count_cache("memory", "miss")
+    return _remember(dataset, year, name, read_table(name))
 
 
+def clear_memory_cache():
+    with _memory_lock:
+        _memory_cache.clear()
+
+
+def _dataset_path(dataset, year):
+    if year == "all":
+        return CLEAN_PATH if dataset == "countries" else CLEAN_PATH_CONTINENTS
+    prefix = "historical" if dataset == "countries" else "continents"
+    return os.path.join("data", "cleaned", f"{prefix}_{year}")
+
+
+def data_version(dataset, year):
+    """Jeton de version des données (mtime du fichier en cache), None si absent"""
+    path = table_path(_dataset_path(dataset, year))
+    if not os.path.exists(path):
+        return None
+    return os.path.getmtime(path)
+
+
+def read_cached_dataset(dataset, year) -> pd.DataFrame:
+    """
+    Lit le dernier fichier disponible sur disque, même expiré, sans jamais
+    appeler l'API (DataFrame vide si rien n'a encore été téléchargé).
+    """
+    name = _dataset_path(dataset, year)
+    if not os.path.exists(table_path(name)):
+        return pd.DataFrame()
+    return _read_cached(dataset, year, name)
+
+
+def _load_or_refresh(dataset, year, name, refresh):
+    """
+    Lit la table si le cache TTL est valide, sinon appelle refresh() sous
+    verrou inter-processus. Les workers qui attendaient le verrou relisent
+    le résultat du premier au lieu de rappeler l'API eux aussi.
+    """
+    if is_cache_valid(table_path(name), CACHE_TTL_SECONDS):
+        count_cache("ttl", "hit")
+        return _read_cached(dataset, year, name)
+
+    with file_lock(name):
+        if is_cache_valid(table_path(name), CACHE_TTL_SECONDS):
+            count_cache("ttl", "hit")  # rafraîchi par un autre worker pendant l'attente
+            return _read_cached(dataset, year, name)
+        count_cache("ttl", "miss")
+        return refresh()
+
 def load_current_countries_data() -> pd.DataFrame:
     """
     Charge les données 'current' depuis data/cleaned si le cache est valide.
     Sinon, rafraîchit en appelant get_data() puis clean_data().
     """
-    if is_cache_valid(CLEAN_PATH, CACHE_TTL_SECONDS):
-        return pd.read_csv(CLEAN_PATH)
+    def refresh():
+        # 304 : données inchangées, pas besoin de re-nettoyer
+        if get_data() is not None or not os.path.exists(table_path(CLEAN_PATH)):
+            clean_data()
+        else:
+            os.utime(table_path(CLEAN_PATH))
+        return _read_cached("countries", "all", CLEAN_PATH)
 
-    # Rafraîchissement
-    get_data()
-    clean_data()
-    return pd.read_csv(CLEAN_PATH)
+    return _load_or_refresh("countries", "all", CLEAN_PATH, refresh)
 
-def load_current_continents_data() -> pd.DataFrame:
+def _load_rollup(year, df_countries):
     """
-    Charge les données 'current' depuis data/cleaned si le cache est valide.
-    Sinon, rafraîchit en appelant get_data() puis clean_data().
+    Agrégat par continent dérivé localement de la table pays de la même
+    période (aucun appel API). Il n'est recalculé que si la table pays est
+    plus récente que lui.
     """
+    name = _dataset_path("continents", year)
+    source = table_path(_dataset_path("countries", year))
+
+    def is_fresh():
+        path = table_path(name)
+        return (os.path.exists(path) and os.path.exists(source)
+                and os.path.getmtime(path) >= os.path.getmtime(source))
 
-    if is_cache_valid(CLEAN_PATH_CONTINENTS, CACHE_TTL_SECONDS):
-        return pd.read_csv(CLEAN_PATH_CONTINENTS)
+    if is_fresh():
+        count_cache("rollup", "hit")
+        return _read_cached("continents", year, name)
 
-    # Rafraîchissement
-    get_data_continents()
-    clean_data_continents()
-    return pd.read_csv(CLEAN_PATH_CONTINENTS)
+    with file_lock(name):
+        if is_fresh():
+            count_cache("rollup", "hit")
+            return _read_cached("continents", year, name)
+        count_cache("rollup", "miss")
+        df = region_rollup(df_countries, country_continent())
+        if df.empty and os.path.exists(table_path(name)):
+            # table pays vide : on garde l'ancien cache plutôt que de l'écraser par un fichier vide
+            return _read_cached("continents", year, name)
+        write_table(df, name)
+        return _remember("continents", year, name, df)
+
+def load_current_continents_data() -> pd.DataFrame:
+    """Données 'current' par continent, agrégées depuis les données pays actuelles"""
+    return _load_rollup("all", load_current_countries_data())
 
 def load_historical_year_data(year: int) -> pd.DataFrame:
     """
     Cache disque par année pour éviter de re-taper l'API à chaque changement.
-    On stocke dans data/cleaned/historical_<year>.csv
+    On stocke dans data/cleaned/historical_<year> (format de src/utils/storage.py)
     """
-    hist_path = os.path.join("data", "cleaned", f"historical_{year}.csv")
+    hist_path = _dataset_path("countries", year)
 
-    if is_cache_valid(hist_path, CACHE_TTL_SECONDS):
-        return pd.read_csv(hist_path)
+    def refresh():
+        # Import local pour éviter import circulaire si tu bouges la fonction plus tard
+        from src.utils.historical import fetch_historical_countries
 
-    # Import local pour éviter import circulaire si tu bouges la fonction plus tard
-    from src.utils.historical import fetch_historical_countries
+        df = fetch_historical_countries(year)
+        if df.empty:
+            # API indisponible : on garde l'ancien cache plutôt que de l'écraser par un fichier vide,
+            # et sans cache rien n'est écrit (une table vide passerait pour fraîche pendant un TTL)
+            if os.path.exists(table_path(hist_path)):
+                return _read_cached("countries", year, hist_path)
+            return df
+        write_table(df, hist_path)  # écrit le cache [web:97]
+        return _remember("countries", year, hist_path, df)
 
-    df = fetch_historical_countries(year)
-    os.makedirs(os.path.dirname(hist_path), exist_ok=True)
-    df.to_csv(hist_path, index=False, encoding="utf-8")  # écrit le cache [web:97]
-    return df
+    return _load_or_refresh("countries", year, hist_path, refresh)
 
 def export_continent_csv(year):
     """
-    Cache disque par année et par continent pour éviter de re-taper l'API à chaque changement.
-    On stocke dans data/cleaned/continents_<year>.csv
+    Cache disque par année et par continent, agrégé depuis les données pays de l'année.
+    On stocke dans data/cleaned/continents_<year> (format de src/utils/storage.py)
     """
-    hist_path = os.path.join("data", "cleaned", f"continents_{year}.csv")
-    
-    if is_cache_valid(hist_path, CACHE_TTL_SECONDS):
-        return pd.read_csv(hist_path)
-
-    # Import local pour éviter import circulaire si tu bouges la fonction plus tard
-    from src.utils.historical import fetch_historical_continents
-
-    df = fetch_historical_continents(year)
-    os.makedirs(os.path.dirname(hist_path), exist_ok=True)
-    df.to_csv(hist_path, index=False, encoding="utf-8")  # écrit le cache [web:97]
-    return df
+    return _load_rollup(year, load_historical_year_data(year))
@@ -0,0 +1,78 @@
+# src/utils/derived.py
+import numpy as np
+
+DERIVED_BASES = ["cases", "deaths"]
+ROLLING_WINDOWS = [7, 14]
+GROWTH_WINDOW = 7
+PER_CAPITA = 100_000
+
+# Métriques dérivées de la timeline : libellé et métrique de base (couleurs des graphiques)
+DERIVED_METRICS = {
+    "new_cases": {"title": "Nouveaux cas (par jour)", "base": "cases"},
+    "new_cases_7d": {"title": "Nouveaux cas, moyenne 7 jours", "base": "cases"},
+    "new_cases_14d": {"title": "Nouveaux cas, moyenne 14 jours", "base": "cases"},
+    "cases_growth": {"title": "Croissance hebdomadaire des cas (%)", "base": "cases"},
+    "cases_per_100k": {"title": "Cas pour 100 000 habitants", "base": "cases"},
+    "new_cases_7d_per_100k": {"title": "Nouveaux cas (moy. 7 jours) pour 100 000 hab.", "base": "cases"},
+    "new_deaths": {"title": "Nouveaux décès (par jour)", "base": "deaths"},
+    "new_deaths_7d": {"title": "Nouveaux décès, moyenne 7 jours", "base": "deaths"},
+    "new_deaths_14d": {"title": "Nouveaux décès, moyenne 14 jours", "base": "deaths"},
+    "deaths_growth": {"title": "Croissance hebdomadaire des décès (%)", "base": "deaths"},
+    "deaths_per_100k": {"title": "Décès pour 100 000 habitants", "base": "deaths"},
+}
+
+
+def daily_delta(grid):
+    """Valeur du jour moins celle de la veille (le premier jour connu garde son cumul)"""
+    delta = np.diff(np.nan_to_num(grid), axis=1, prepend=0)
+    delta[np.isnan(grid)] = np.nan
+    return delta
+
+
+def rolling_mean(grid, window):
+    """
+    Moyenne glissante sur `window` jours par différence de sommes cumulées
+    (une passe pour toute la grille). Les premiers jours sont moyennés sur
+    les jours disponibles.
+    """
+    cumsum = np.cumsum(np.nan_to_num(grid), axis=1)
+    total = cumsum.copy()
+    total[:, window:] -= cumsum[:, :-window]
+    mean = total / np.minimum(np.arange(1, grid.shape[1] + 1), window)
+    mean[np.isnan(grid)] = np.nan
+    return mean
+
+
+def growth_rate(grid, lag=GROWTH_WINDOW):
+    """Variation en % par rapport à `lag` jours plus tôt (NaN si la référence est nulle ou négative)"""
+    rate = np.full(grid.shape, np.nan)
+    previous, current = grid[:, :-lag], grid[:, lag:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate[:, lag:] = np.where(previous > 0, (current / previous - 1) * 100, np.nan)
+    return rate
+
+
+def per_capita(grid, population):
+    """Valeur pour PER_CAPITA habitants (NaN sans population connue)"""
+    population = np.where(population > 0, population, np.nan)
+    return grid / population[:, None] * PER_CAPITA
+
+
+def derive(values, population):
+    """
+    Toutes les métriques de DERIVED_METRICS à partir des cumuls complétés
+    ({métrique: grille lignes × jours}) et de la population de chaque ligne.
+    Les lignes peuvent être des séries, des continents ou le total mondial :
+    les taux d'un agrégat sont ainsi calculés sur ses sommes, pas moyennés.
+    Résultats en float32.
+    """
+    derived = {}
+    for m in DERIVED_BASES:
+        new = daily_delta(values[m])
+        derived[f"new_{m}"] = new
+        for window in ROLLING_WINDOWS:
+            derived[f"new_{m}_{window}d"] = rolling_mean(new, window)
+        derived[f"{m}_growth"] = growth_rate(derived[f"new_{m}_{GROWTH_WINDOW}d"])
+        derived[f"{m}_per_100k"] = per_capita(values[m], population)
+    derived["new_cases_7d_per_100k"] = per_capita(derived["new_cases_7d"], population)
+    return {name: derived[name].astype(np.float32) for name in DERIVED_METRICS}
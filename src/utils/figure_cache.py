@@ -0,0 +1,53 @@
+# src/utils/figure_cache.py
+import threading
+from collections import OrderedDict
+
+from config import FIGURE_CACHE_SIZE
+from src.utils.metrics import count_cache, timed
+
+# (graphique, période, métrique) -> (version des données, figure sérialisée), en LRU :
+# les dates du curseur rendent l'espace des figures trop grand pour tout garder
+_figure_cache = OrderedDict()
+_figure_lock = threading.Lock()
+
+
+def get_or_build_figure(chart, year, metric, version, build):
+    """
+    Renvoie la figure sérialisée (dict prêt pour Dash) depuis le cache.
+    build() n'est appelé que si la figure n'existe pas encore pour cette
+    version des données ; les entrées de l'ancienne version sont supprimées.
+    """
+    key = (chart, year, metric)
+    with _figure_lock:
+        hit = _figure_cache.get(key)
+        if hit is not None and hit[0] == version:
+            _figure_cache.move_to_end(key)
+            count_cache("figure", "hit")
+            return hit[1]
+    count_cache("figure", "miss")
+
+    with timed(f"figure_{chart}"):
+        figure = build().to_dict()
+
+    with _figure_lock:
+        # Les données ont changé : on purge les figures périmées de ce graphique pour cette année
+        stale = [k for k, (v, _) in _figure_cache.items() if k[:2] == key[:2] and v != version]
+        for k in stale:
+            del _figure_cache[k]
+        _figure_cache[key] = (version, figure)
+        _figure_cache.move_to_end(key)
+        while len(_figure_cache) > FIGURE_CACHE_SIZE:
+            _figure_cache.popitem(last=False)
+    return figure
+
+
+def get_cached_figure(chart, year, metric, version):
+    """Figure déjà construite pour cette version des données, sans la construire (None sinon)"""
+    with _figure_lock:
+        hit = _figure_cache.get((chart, year, metric))
+    return hit[1] if hit is not None and hit[0] == version else None
+
+
+def clear_figure_cache():
+    with _figure_lock:
+        _figure_cache.clear()
@@ -1,32 +1,110 @@
 # src/utils/get_data.py
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import API_URL
+from src.utils.common_functions import atomic_path
+from src.utils.metrics import count_cache, timed
 
 RAW_PATH = os.path.join("data", "raw", "rawdata.json")
-URL = "https://disease.sh/v3/covid-19/countries"
-RAW_PATH_CONTINENTS = os.path.join("data", "raw", "rawdata_continents.json")
-URL_c = "https://disease.sh/v3/covid-19/continents?strict=true"
+URL = f"{API_URL}/v3/covid-19/countries"
+
+CHUNK_SIZE = 1 << 16
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Session HTTP partagée : connexions TCP/TLS réutilisées entre les appels
+    et nouvelles tentatives avec backoff sur les erreurs temporaires.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+    return _session
+
+
+def _meta_path(path):
+    return path + ".meta.json"
 
-def get_data():
-    os.makedirs(os.path.dirname(RAW_PATH), exist_ok=True)
-    r = requests.get(URL, timeout=15)
-    r.raise_for_status()
-    data = r.json()
 
-    with open(RAW_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False)
+def _read_meta(path):
+    if not (os.path.exists(path) and os.path.exists(_meta_path(path))):
+        return {}
+    with open(_meta_path(path), "r", encoding="utf-8") as f:
+        return json.load(f)
 
-    return RAW_PATH
 
-def get_data_continents():
+def fetch_to_file(url, path, params=None, timeout=15, conditional=True) -> bool:
+    """
+    Télécharge url dans path en streaming (le corps n'est jamais chargé en mémoire).
+    Envoie ETag / Last-Modified de la réponse précédente : renvoie False si
+    le serveur répond 304 (fichier local inchangé), True sinon.
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    with timed(f"download_{name}"):
+        changed = _fetch_to_file(url, path, params, timeout, conditional)
+    count_cache("http", "downloaded" if changed else "not_modified")
+    return changed
+
+
+def _fetch_to_file(url, path, params, timeout, conditional):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    meta = _read_meta(path) if conditional else {}
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    with get_session().get(url, params=params, headers=headers, stream=True, timeout=timeout) as r:
+        if r.status_code == 304:
+            os.utime(path)
+            return False
+        r.raise_for_status()
+
+        with atomic_path(path) as tmp_path:
+            with open(tmp_path, "wb") as f:
+                for chunk in r.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+
+        meta = {"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}
+
+    with atomic_path(_meta_path(path)) as tmp_path:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+    return True
+
+
+def get_data():
+    """Renvoie RAW_PATH si les données ont changé, None si l'API a répondu 304"""
+    return RAW_PATH if fetch_to_file(URL, RAW_PATH) else None
 
-    os.makedirs(os.path.dirname(RAW_PATH_CONTINENTS), exist_ok=True)
-    r = requests.get(URL_c, timeout=15)
-    r.raise_for_status()
-    data = r.json()
 
-    with open(RAW_PATH_CONTINENTS, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False)
+def run_parallel(jobs, max_workers=4):
+    """
+    Exécute des fonctions sans argument en parallèle (même Session HTTP).
+    Renvoie la liste des résultats, ou l'exception levée, dans l'ordre des jobs.
+    """
+    def safe(job):
+        try:
+            return job()
+        except Exception as e:
+            return e
 
-    return RAW_PATH_CONTINENTS
\ No newline at end of file
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(safe, jobs))
@@ -1,135 +1,297 @@
-import pandas as pd
-import requests
 import os
-from src.utils.clean_data import get_country_continent_csv
+import threading
 
-def fetch_historical_countries(year):
-    """Récupère les données historiques par pays pour une année donnée"""
-    url = f"https://disease.sh/v3/covid-19/historical?lastdays=all"
+import numpy as np
+import pandas as pd
+
+from config import API_URL, CACHE_TTL_SECONDS, HISTORICAL_INCREMENTAL_REFRESH
+from src.utils.country_reference import get_country_reference, resolve_countries, sum_by_country
+from src.utils.common_functions import file_lock, is_cache_valid
+from src.utils.get_data import fetch_to_file
+from src.utils.json_stream import iter_json_array
+from src.utils.metrics import timed
+from src.utils.schema import compact, dense_ids
+from src.utils.storage import read_table, table_path, write_table
+from src.utils.timeline_index import build_timeline_index
+
+URL_HISTORICAL = f"{API_URL}/v3/covid-19/historical"
+RAW_PATH_HISTORICAL = os.path.join("data", "raw", "historical_{}.json")
+TIMELINE_PATH = os.path.join("data", "cleaned", "timeline")
+TIMELINE_METRICS = ["cases", "deaths", "recovered"]
+
+# Dernière version du store lue en mémoire : {"mtime": float, "df": DataFrame, "index": ...}
+_timeline_memo = {}
+# Index mappé depuis le snapshot partagé (workers non éditeurs) : {"index": ...}
+_shared_index = {}
+_index_lock = threading.Lock()
+
+
+def _date_codes(keys, known):
+    """Code de chaque clé "M/D/YY" dans known (complété au besoin), dans l'ordre des clés"""
+    codes = list(map(known.get, keys))
+    if None in codes:
+        for key in keys:
+            known.setdefault(key, len(known))
+        codes = list(map(known.get, keys))
+    return codes
+
+
+@timed("timeline_ingest")
+def timeline_from_json(entries):
+    """
+    Met à plat la réponse de l'endpoint historical :
+    une ligne par (pays, province, date) avec cases / deaths / recovered.
+
+    Les entrées sont consommées une à une (liste ou itérateur en streaming) :
+    seuls des tableaux numpy sont accumulés (codes de date et valeurs par série),
+    chaque date distincte n'est parsée qu'une fois à la fin, puis les valeurs
+    sont rangées dans une grille pays × date par métrique.
+    """
+    known = {}
+    countries, provinces = [], []
+    counts = {m: [] for m in TIMELINE_METRICS}
+    codes = {m: [] for m in TIMELINE_METRICS}
+    values = {m: [] for m in TIMELINE_METRICS}
+
+    for entry in entries:
+        countries.append(entry["country"])
+        provinces.append(entry.get("province"))
+        timeline = entry.get("timeline") or {}
+        for m in TIMELINE_METRICS:
+            series = timeline.get(m) or {}
+            counts[m].append(len(series))
+            codes[m].append(np.array(_date_codes(series, known), dtype=np.int32))
+            values[m].append(np.fromiter(series.values(), dtype="float64", count=len(series)))
+
+    if not known:
+        return pd.DataFrame(columns=["country", "province", "date"] + TIMELINE_METRICS)
+
+    parsed = pd.to_datetime(pd.Index(list(known), dtype=object), format="%m/%d/%y")
+    order = np.argsort(parsed.to_numpy(), kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))  # codes de date dans l'ordre chronologique
+    dates = parsed.to_numpy()[order]
+
+    grid = {}
+    for m in TIMELINE_METRICS:
+        rows = np.repeat(np.arange(len(countries)), counts[m])
+        grid[m] = np.full((len(countries), len(dates)), np.nan)
+        grid[m][rows, rank[np.concatenate(codes[m])]] = np.concatenate(values[m])
+
+    # Les lignes existantes sont celles où "cases" est renseigné
+    rows, cols = np.nonzero(~np.isnan(grid["cases"]))
+    df = pd.DataFrame({
+        "country": np.array(countries, dtype=object)[rows],
+        "province": np.array(provinces, dtype=object)[rows],
+        "date": dates[cols],
+    })
+    for m in TIMELINE_METRICS:
+        df[m] = np.nan_to_num(grid[m][rows, cols]).astype("int64")
+    df = df.sort_values(["country", "province", "date"], na_position="first").reset_index(drop=True)
+    return compact(df)
+
+
+def _raw_timeline_path(lastdays):
+    # "all" et la sonde à 1 jour gardent leur fichier (requêtes conditionnelles), les deltas partagent le leur
+    return RAW_PATH_HISTORICAL.format(lastdays if lastdays in ("all", 1) else "delta")
+
+
+def download_timeline(lastdays="all"):
+    """
+    Télécharge en un seul appel l'historique de tous les pays (les `lastdays`
+    derniers jours) directement sur disque. Renvoie False si l'API a répondu 304.
+    """
+    path = _raw_timeline_path(lastdays)
+    return fetch_to_file(URL_HISTORICAL, path, params={"lastdays": lastdays}, timeout=60,
+                         conditional=lastdays in ("all", 1))
+
+
+def read_raw_timeline(lastdays="all"):
+    return timeline_from_json(iter_json_array(_raw_timeline_path(lastdays)))
+
+
+def fetch_timeline(lastdays="all"):
+    """Télécharge puis lit la timeline ; None si l'API a répondu 304 (rien à relire ni à nettoyer)"""
+    if not download_timeline(lastdays):
+        return None
+    return read_raw_timeline(lastdays)
+
+
+def save_timeline(df):
+    write_table(df, TIMELINE_PATH)
+    _timeline_memo.clear()
+    return TIMELINE_PATH
+
+
+def read_timeline():
+    """Lit le store local (gardé en mémoire tant que le fichier n'a pas changé)"""
+    mtime = os.path.getmtime(table_path(TIMELINE_PATH))
+    if _timeline_memo.get("mtime") != mtime:
+        df = read_table(TIMELINE_PATH)
+        df["date"] = pd.to_datetime(df["date"])  # déjà typé en feather, texte en CSV
+        _timeline_memo.update(mtime=mtime, df=df)
+    return _timeline_memo["df"]
+
+
+def keep_timeline(timeline):
+    """Rien de nouveau côté API : le store repart pour un TTL sans être réécrit"""
+    os.utime(table_path(TIMELINE_PATH))
+    _timeline_memo["mtime"] = os.path.getmtime(table_path(TIMELINE_PATH))
+    return timeline
+
+
+def append_timeline(timeline, delta):
+    """Ajoute les nouvelles lignes à la fin du store"""
+    delta = delta[timeline.columns]
+    df = compact(pd.concat([timeline, delta], ignore_index=True))  # catégories fusionnées
+    write_table(df, TIMELINE_PATH)  # réécriture atomique : jamais de fichier partiel pour les autres workers
+    _timeline_memo.update(mtime=os.path.getmtime(table_path(TIMELINE_PATH)), df=df)
+    return df
+
+
+def refresh_timeline(timeline):
+    """
+    Rafraîchissement incrémental : on ne demande à l'API que les jours
+    postérieurs à la dernière date déjà stockée.
+    """
+    last_date = timeline["date"].max()
+
+    # Sonde légère (1 jour) pour connaître la dernière date disponible côté API
+    latest = fetch_timeline(1)
+    if latest is None or latest.empty or latest["date"].max() <= last_date:
+        return keep_timeline(timeline)
+
+    missing_days = (latest["date"].max() - last_date).days
+    delta = latest if missing_days == 1 else fetch_timeline(missing_days)
+    return append_timeline(timeline, delta[delta["date"] > last_date])
+
+
+def load_timeline():
+    """
+    Store local de l'historique complet (pays × date).
+    Un seul téléchargement tant que le cache TTL est valide, toutes les
+    années sont ensuite découpées localement dans ce tableau.
+    À expiration du TTL, seuls les jours manquants sont récupérés.
+    """
+    if is_cache_valid(table_path(TIMELINE_PATH), CACHE_TTL_SECONDS):
+        return read_timeline()
+
+    # Un seul worker rafraîchit, les autres attendent puis relisent son résultat
+    with file_lock(TIMELINE_PATH):
+        if is_cache_valid(table_path(TIMELINE_PATH), CACHE_TTL_SECONDS):
+            return read_timeline()
+        return _refresh_timeline_store()
+
+
+def _refresh_timeline_store():
     try:
-        response = requests.get(url, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-        
-        countries_data = []
-        
-        for country in data:
-            country_name = country['country']
-            timeline = country['timeline']
-            
-            # Chercher la date du 31 décembre de l'année
-            target_date = f"12/31/{str(year)[2:]}"  # Format: MM/DD/YY
-            
-            # Chercher toutes les dates de décembre de cette année
-            december_dates = [d for d in timeline['cases'].keys() if d.endswith(f"/{str(year)[2:]}") and d.startswith("12/")]
-            
-            if december_dates:
-                # Prendre la dernière date disponible en décembre
-                last_date = sorted(december_dates, key=lambda x: int(x.split('/')[1]))[-1]
-                
-                cases = timeline['cases'].get(last_date, 0)
-                deaths = timeline['deaths'].get(last_date, 0)
-                recovered = timeline['recovered'].get(last_date, 0)
-                
-                countries_data.append({
-                    'country': country_name,
-                    'cases': cases,
-                    'deaths': deaths,
-                    'recovered': recovered,
-                    'active': cases - deaths - recovered
-                })
-        
-        df = pd.DataFrame(countries_data)
-        
-        # Ajouter les codes ISO3
-        iso_mapping = {
-            'USA': 'USA', 'India': 'IND', 'Brazil': 'BRA', 'France': 'FRA',
-            'Germany': 'DEU', 'UK': 'GBR', 'Italy': 'ITA', 'Russia': 'RUS',
-            'Turkey': 'TUR', 'Spain': 'ESP', 'Vietnam': 'VNM', 'Argentina': 'ARG',
-            'Japan': 'JPN', 'Netherlands': 'NLD', 'Iran': 'IRN', 'Colombia': 'COL',
-            'Indonesia': 'IDN', 'Poland': 'POL', 'Mexico': 'MEX', 'Ukraine': 'UKR',
-            'South Africa': 'ZAF', 'Philippines': 'PHL', 'Malaysia': 'MYS',
-            'Peru': 'PER', 'Canada': 'CAN', 'Czechia': 'CZE', 'Belgium': 'BEL',
-            'Thailand': 'THA', 'Israel': 'ISR', 'Portugal': 'PRT', 'Greece': 'GRC',
-            'Chile': 'CHL', 'Denmark': 'DNK', 'Romania': 'ROU', 'Sweden': 'SWE',
-            'Iraq': 'IRQ', 'Switzerland': 'CHE', 'Bangladesh': 'BGD',
-            'Pakistan': 'PAK', 'South Korea': 'KOR', 'Austria': 'AUT',
-            'Serbia': 'SRB', 'Hungary': 'HUN', 'Jordan': 'JOR', 'Morocco': 'MAR',
-            'Nepal': 'NPL', 'UAE': 'ARE', 'Cuba': 'CUB', 'Lebanon': 'LBN',
-            'Saudi Arabia': 'SAU', 'Kazakhstan': 'KAZ', 'Tunisia': 'TUN',
-            'Guatemala': 'GTM', 'Bulgaria': 'BGR', 'Ecuador': 'ECU',
-            'Bolivia': 'BOL', 'Slovakia': 'SVK', 'Azerbaijan': 'AZE',
-            'Croatia': 'HRV', 'Costa Rica': 'CRI', 'Myanmar': 'MMR',
-            'Lithuania': 'LTU', 'Slovenia': 'SVN', 'Belarus': 'BLR',
-            'Uruguay': 'URY', 'Panama': 'PAN', 'Mongolia': 'MNG',
-            'Paraguay': 'PRY', 'Sri Lanka': 'LKA', 'Kenya': 'KEN',
-            'Kuwait': 'KWT', 'Dominican Republic': 'DOM', 'Palestine': 'PSE',
-            'Georgia': 'GEO', 'Ethiopia': 'ETH', 'Venezuela': 'VEN',
-            'Egypt': 'EGY', 'Moldova': 'MDA', 'Libya': 'LBY',
-            'Honduras': 'HND', 'Armenia': 'ARM', 'Bosnia': 'BIH',
-            'Oman': 'OMN', 'Qatar': 'QAT', 'Zambia': 'ZMB',
-            'Albania': 'ALB', 'North Macedonia': 'MKD', 'Algeria': 'DZA',
-            'Botswana': 'BWA', 'Nigeria': 'NGA', 'Zimbabwe': 'ZWE',
-            'Uzbekistan': 'UZB', 'Montenegro': 'MNE', 'Mozambique': 'MOZ',
-            'Finland': 'FIN', 'Latvia': 'LVA', 'Kyrgyzstan': 'KGZ',
-            'Norway': 'NOR', 'Singapore': 'SGP', 'Ireland': 'IRL',
-            'El Salvador': 'SLV', 'China': 'CHN', 'Australia': 'AUS',
-            'Afghanistan': 'AFG', 'Cameroon': 'CMR', 'Namibia': 'NAM',
-            'Uganda': 'UGA', 'Cyprus': 'CYP', 'Ghana': 'GHA',
-            'Rwanda': 'RWA', 'Jamaica': 'JAM', 'Cambodia': 'KHM',
-            'Trinidad and Tobago': 'TTO', 'Estonia': 'EST', 'Senegal': 'SEN',
-            'Malawi': 'MWI', 'Ivory Coast': 'CIV', 'DRC': 'COD',
-            'Suriname': 'SUR', 'Maldives': 'MDV', 'Syria': 'SYR',
-            'Laos': 'LAO', 'Mauritania': 'MRT', 'Fiji': 'FJI',
-            'Guyana': 'GUY', 'Mauritius': 'MUS', 'Eswatini': 'SWZ',
-            'Bhutan': 'BTN', 'Luxembourg': 'LUX', 'Madagascar': 'MDG',
-            'Sudan': 'SDN', 'Malta': 'MLT', 'Cabo Verde': 'CPV',
-            'Bahamas': 'BHS', 'Belize': 'BLZ', 'Iceland': 'ISL',
-            'Hong Kong': 'HKG', 'Barbados': 'BRB', 'S. Korea': 'KOR',
-            'Taiwan': 'TWN', 'New Zealand': 'NZL', 'Nicaragua': 'NIC'
-        }
-        
-        df['iso3'] = df['country'].map(iso_mapping)
-        df = df[df['iso3'].notna()]
-        
-        return df
-        
+        if HISTORICAL_INCREMENTAL_REFRESH and os.path.exists(table_path(TIMELINE_PATH)):
+            timeline = read_timeline()
+            if not timeline.empty:
+                return refresh_timeline(timeline)
+        df = fetch_timeline()
+        if df is None:
+            # 304 : historique inchangé, le store existant suffit s'il y en a un
+            if os.path.exists(table_path(TIMELINE_PATH)):
+                return keep_timeline(read_timeline())
+            df = read_raw_timeline()
     except Exception as e:
-        print(f"Erreur données historiques: {e}")
-        return pd.DataFrame()
+        # Pas de réseau : on garde l'ancien store s'il existe
+        if os.path.exists(table_path(TIMELINE_PATH)):
+            print(f"Erreur rafraîchissement historique, store local conservé: {e}")
+            return read_timeline()
+        raise
 
-def fetch_historical_continents(year):
-    hist_path = os.path.join("data", "cleaned", f"historical_{year}.csv")
+    save_timeline(df)
+    return df
 
-    if os.path.exists(hist_path):
-        df_countries = pd.read_csv(hist_path)
-    else:
-        df_countries = fetch_historical_countries(year)
-        df_countries.to_csv(hist_path, index=False, encoding="utf-8")
 
-    if df_countries.empty:
-        return pd.DataFrame()
+def set_shared_timeline_index(index):
+    """Utilise l'index publié dans le snapshot partagé au lieu de construire le sien"""
+    _shared_index["index"] = index
 
-    mapping_path = os.path.join("data", "cleaned", "country_continent.csv")
-    if not os.path.exists(mapping_path):
-        get_country_continent_csv()
-    df_mapping = pd.read_csv(mapping_path)
 
-    df_countries = df_countries.merge(
-        df_mapping,
-        on="country",
-        how="left"
-    )
+def get_timeline_index():
+    """
+    Index par date de la timeline : celui du snapshot partagé s'il y en a un
+    (mappé, jamais reconstruit), sinon celui construit depuis le store local.
+    """
+    if "index" in _shared_index:
+        return _shared_index["index"]
+    return local_timeline_index()
 
-    df_countries = df_countries[df_countries["continent"].notna()]
 
-    df_continent = (
-        df_countries
-        .groupby("continent")[["cases", "deaths", "recovered", "active"]]
-        .sum()
-        .reset_index()
-    )
+def local_timeline_index():
+    """
+    Index par date de la timeline stockée (voir src/utils/timeline_index.py),
+    reconstruit seulement quand le store change. Ne lit que le disque : None
+    tant qu'aucune timeline n'a été téléchargée.
+    """
+    if not os.path.exists(table_path(TIMELINE_PATH)):
+        return None
+    timeline = read_timeline()
+    with _index_lock:
+        if _timeline_memo.get("index_of") is not timeline:
+            with timed("timeline_index"):
+                index = build_timeline_index(timeline, get_country_reference())
+            if index is not None:
+                index["version"] = _timeline_memo.get("mtime")
+            _timeline_memo.update(index_of=timeline, index=index)
+        return _timeline_memo["index"]
 
-    df_continent["year"] = year
-    return df_continent
 
+def timeline_as_of(timeline, date, not_before=None):
+    """
+    Dernière ligne disponible à `date` ou avant, pour chaque (pays, province),
+    en une seule recherche vectorisée (searchsorted) sur tous les pays.
+    Les séries dont la dernière valeur est antérieure à `not_before` sont écartées.
+    """
+    if timeline.empty:
+        return timeline
+
+    series, _ = dense_ids(timeline, ["country", "province"])
+    days = timeline["date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+    order = np.lexsort((days, series))
+
+    # Clé triée unique (série, jour) : une recherche par série donne sa dernière date <= date
+    span = np.int64(1 << 20)
+    keys = series[order] * span + days[order]
+    n_series = int(series.max()) + 1
+    target = np.datetime64(pd.Timestamp(date), "D").astype(np.int64)
+    pos = np.searchsorted(keys, np.arange(n_series) * span + target, side="right") - 1
+
+    found = pos >= 0
+    rows = order[pos[found]]
+    keep = series[rows] == np.arange(n_series)[found]
+    if not_before is not None:
+        keep &= days[rows] >= np.datetime64(pd.Timestamp(not_before), "D").astype(np.int64)
+    return timeline.iloc[rows[keep]]
+
+
+def timeline_snapshot(timeline, year):
+    """Dernière date disponible en décembre de l'année, pour chaque pays"""
+    last = timeline_as_of(timeline, f"{year}-12-31", not_before=f"{year}-12-01")
+
+    df = last[["country"] + TIMELINE_METRICS].sort_values("country", kind="stable").reset_index(drop=True)
+    df["active"] = df["cases"] - df["deaths"] - df["recovered"]
+    return df
+
+
+def fetch_historical_countries(year):
+    """
+    Récupère les données historiques par pays pour une année donnée.
+    Une référence pays absente ou qui ne reconnaît aucun pays lève une
+    erreur au lieu de renvoyer une table vide qui serait mise en cache.
+    """
+    reference = get_country_reference()
+    try:
+        df = timeline_snapshot(load_timeline(), year)
+    except Exception as e:
+        print(f"Erreur données historiques: {e}")
+        return pd.DataFrame()
+
+    # Nom canonique et code ISO3 par la référence pays (alias compris), provinces sommées par pays
+    resolved = sum_by_country(resolve_countries(df, reference=reference), TIMELINE_METRICS + ["active"])
+    if resolved.empty and not df.empty:
+        raise ValueError(f"Référence pays inutilisable : aucun pays de la timeline {year} reconnu")
+    return resolved
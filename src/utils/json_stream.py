@@ -0,0 +1,88 @@
+# src/utils/json_stream.py
+import json
+import re
+
+import pandas as pd
+
+CHUNK_SIZE = 1 << 20
+
+_decoder = json.JSONDecoder()
+_separators = re.compile(r"[\s,]*")
+_whitespace = re.compile(r"\s*")
+
+
+def iter_json_array(path, chunk_size=CHUNK_SIZE):
+    """
+    Parcourt un fichier contenant un tableau JSON élément par élément.
+    Le fichier est lu par blocs de chunk_size caractères : seul l'élément
+    en cours et le bloc lu restent en mémoire, quelle que soit la taille du tableau.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        buf, pos, eof = "", 0, False
+
+        def more():
+            # Au moins autant que ce qui reste dans le tampon : un élément plus
+            # grand qu'un bloc est relu un nombre logarithmique de fois
+            nonlocal buf, pos, eof
+            chunk = f.read(max(chunk_size, len(buf) - pos))
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            return not eof
+
+        while True:
+            pos = _separators.match(buf, pos).end()
+            if pos < len(buf) or not more():
+                break
+        if buf[pos:pos + 1] != "[":
+            raise ValueError(f"{path} : tableau JSON attendu")
+        pos += 1
+
+        while True:
+            pos = _separators.match(buf, pos).end()
+            if pos == len(buf):
+                if not more():
+                    raise ValueError(f"{path} : tableau JSON incomplet")
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                item, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if not more():
+                    raise
+                continue
+            # Un élément n'est complet que suivi de "," ou "]" : en fin de bloc,
+            # un nombre peut être tronqué (12 pour 12345, 6.5 pour 6.5e3)
+            following = _whitespace.match(buf, end).end()
+            if following == len(buf) or buf[following] not in ",]":
+                if more():
+                    continue
+                if following == len(buf):
+                    raise ValueError(f"{path} : tableau JSON incomplet")
+                raise ValueError(f"{path} : caractère inattendu à la position {following}")
+            yield item
+            pos = end
+            if pos > chunk_size:
+                buf, pos = buf[pos:], 0
+
+
+def read_json_columns(path, columns, nested=None) -> pd.DataFrame:
+    """
+    Lit un tableau JSON d'objets en streaming et le range directement en colonnes.
+    nested = {"champ": [clés]} met à plat les sous-objets dans la même passe
+    (clés absentes ou sous-objet manquant -> None).
+    """
+    nested = nested or {}
+    values = {col: [] for col in columns}
+    for field, keys in nested.items():
+        values.update({key: [] for key in keys})
+
+    for record in iter_json_array(path):
+        for col in columns:
+            values[col].append(record.get(col))
+        for field, keys in nested.items():
+            sub = record.get(field)
+            sub = sub if isinstance(sub, dict) else {}
+            for key in keys:
+                values[key].append(sub.get(key))
+    return pd.DataFrame(values)
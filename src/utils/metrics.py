@@ -0,0 +1,138 @@
+# src/utils/metrics.py
+import cProfile
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import request
+
+from config import PROFILE_CALLBACKS, PROFILE_DIR
+
+# Mesures du processus, exposées au format texte Prometheus par render_metrics() :
+# durées (nombre, somme, max) par étape du pipeline et par callback,
+# compteurs de cache (succès/échecs) et tailles des réponses envoyées.
+_durations = {}  # (type, nom) -> [nombre, somme en secondes, max]
+_counters = {}   # (cache, résultat) -> nombre
+_sizes = {}      # (route, sortie du callback Dash) -> [nombre, somme en octets envoyés, max]
+_lock = threading.Lock()
+_profiling = {"enabled": PROFILE_CALLBACKS}
+
+
+def _observe(store, key, value):
+    with _lock:
+        entry = store.setdefault(key, [0, 0, 0])
+        entry[0] += 1
+        entry[1] += value
+        entry[2] = max(entry[2], value)
+
+
+@contextmanager
+def timed(name, kind="stage"):
+    """Chronomètre un bloc (ou une fonction, en décorateur) sous le nom donné"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _observe(_durations, (kind, name), time.perf_counter() - start)
+
+
+def count_cache(cache, result):
+    """Compte un accès à un cache : result vaut "hit", "miss", "not_modified"..."""
+    with _lock:
+        _counters[(cache, result)] = _counters.get((cache, result), 0) + 1
+
+
+def _callback_output():
+    """Sorties du callback Dash visé par la requête ("output" du JSON envoyé), "" hors callback"""
+    if not request.is_json:
+        return ""
+    payload = request.get_json(silent=True)  # déjà lu par Dash : Flask le garde en cache
+    return str(payload.get("output", "")) if isinstance(payload, dict) else ""
+
+
+def observe_response(response):
+    """
+    Hook after_request : taille du corps réellement envoyé, par route et, pour
+    /_dash-update-component, par callback (ses sorties : figures, curseur...).
+    Il est enregistré avant compress_response pour passer après lui (Flask
+    appelle les hooks dans l'ordre inverse) et compter les octets compressés.
+    """
+    nbytes = response.content_length
+    if nbytes is None and not response.direct_passthrough and not response.is_streamed:
+        nbytes = len(response.get_data())
+    if nbytes is not None:
+        _observe(_sizes, (request.endpoint or "inconnue", _callback_output()), nbytes)
+    return response
+
+
+def set_profiling(enabled):
+    """Active ou coupe le profilage cProfile des callbacks sans redémarrer"""
+    _profiling["enabled"] = bool(enabled)
+
+
+def instrument_callback(func):
+    """
+    Décorateur des callbacks Dash : durée de chaque appel et, si le
+    profilage est actif, un fichier .prof par appel dans PROFILE_DIR
+    (à ouvrir avec pstats ou snakeviz).
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with timed(func.__name__, kind="callback"):
+            if not _profiling["enabled"]:
+                return func(*args, **kwargs)
+            profiler = cProfile.Profile()
+            try:
+                return profiler.runcall(func, *args, **kwargs)
+            finally:
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                profiler.dump_stats(os.path.join(PROFILE_DIR, f"{func.__name__}-{time.time_ns()}.prof"))
+    return wrapper
+
+
+def stage_totals():
+    """Copie des durées cumulées : {(type, nom): (nombre, somme en secondes)}"""
+    with _lock:
+        return {k: (v[0], v[1]) for k, v in _durations.items()}
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+def render_metrics():
+    """Toutes les mesures au format d'exposition texte de Prometheus"""
+    with _lock:
+        durations = {k: list(v) for k, v in _durations.items()}
+        counters = dict(_counters)
+        sizes = {k: list(v) for k, v in _sizes.items()}
+
+    lines = []
+    for kind in ("stage", "callback"):
+        metric = f"covid_{kind}_seconds"
+        entries = sorted((name, v) for (k, name), v in durations.items() if k == kind)
+        lines.append(f"# HELP {metric} Durée des {'étapes du pipeline' if kind == 'stage' else 'callbacks Dash'}")
+        lines.append(f"# TYPE {metric} summary")
+        for name, (n, total, _) in entries:
+            lines.append(f"{metric}_count{_labels(**{kind: name})} {n}")
+            lines.append(f"{metric}_sum{_labels(**{kind: name})} {total:.6f}")
+        lines.append(f"# TYPE {metric}_max gauge")
+        for name, (_, _, peak) in entries:
+            lines.append(f"{metric}_max{_labels(**{kind: name})} {peak:.6f}")
+
+    lines.append("# HELP covid_cache_total Accès aux caches par résultat")
+    lines.append("# TYPE covid_cache_total counter")
+    for (cache, result), n in sorted(counters.items()):
+        lines.append(f"covid_cache_total{_labels(cache=cache, result=result)} {n}")
+
+    lines.append("# HELP covid_response_bytes Taille des réponses envoyées (après compression)")
+    lines.append("# TYPE covid_response_bytes summary")
+    for (route, output), (n, total, _) in sorted(sizes.items()):
+        lines.append(f"covid_response_bytes_count{_labels(route=route, output=output)} {n}")
+        lines.append(f"covid_response_bytes_sum{_labels(route=route, output=output)} {total}")
+    lines.append("# TYPE covid_response_bytes_max gauge")
+    for (route, output), (_, _, peak) in sorted(sizes.items()):
+        lines.append(f"covid_response_bytes_max{_labels(route=route, output=output)} {peak}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,93 @@
+# src/utils/payload.py
+import gzip
+
+from dash import Patch
+from flask import request
+from plotly.io.json import to_json_plotly
+
+from config import COMPRESS_MIN_BYTES, FIGURE_DECIMALS, PAYLOAD_OPTIMIZATION
+
+try:
+    import brotli
+except ImportError:  # brotli absent : gzip seulement
+    brotli = None
+
+# text/javascript : type des bundles servis par Dash (/_dash-component-suites/)
+COMPRESSIBLE_TYPES = ("application/json", "text/html", "text/plain", "application/javascript", "text/javascript",
+                      "text/css")
+
+
+def slim_values(values):
+    """
+    Valeurs d'une série prêtes pour une figure : les décimales au-delà de
+    FIGURE_DECIMALS sont arrondies et les flottants passent en float32
+    (les entiers sont déjà compacts, cf. src/utils/schema.py).
+    """
+    if PAYLOAD_OPTIMIZATION and values.dtype.kind == "f":
+        return values.round(FIGURE_DECIMALS).astype("float32")
+    return values
+
+
+def _differs(old, new):
+    if old is new:
+        return False
+    if hasattr(old, "dtype") or hasattr(new, "dtype"):  # tableaux numpy : comparés sous leur forme envoyée
+        return to_json_plotly(old) != to_json_plotly(new)
+    try:
+        return old != new
+    except ValueError:  # tableau numpy imbriqué dans un dict ou une liste
+        return to_json_plotly(old) != to_json_plotly(new)
+
+
+def figure_patch(previous, figure):
+    """
+    Patch Dash qui transforme la figure affichée (previous) en figure :
+    seules les clés de trace et de layout qui changent sont envoyées, le
+    template, la géographie et le reste de la mise en page restent dans le navigateur.
+    Sans figure précédente exploitable, la figure complète est renvoyée.
+    """
+    if previous is None or len(previous.get("data", [])) != len(figure.get("data", [])):
+        return figure
+
+    patch = Patch()
+    for i, (old, new) in enumerate(zip(previous["data"], figure["data"])):
+        for key in old.keys() - new.keys():
+            del patch["data"][i][key]
+        for key, value in new.items():
+            if _differs(old.get(key), value):
+                patch["data"][i][key] = value
+
+    old_layout, new_layout = previous.get("layout", {}), figure.get("layout", {})
+    for key in old_layout.keys() - new_layout.keys():
+        del patch["layout"][key]
+    for key, value in new_layout.items():
+        if _differs(old_layout.get(key), value):
+            patch["layout"][key] = value
+    return patch
+
+
+def compress_response(response):
+    """
+    Hook after_request du serveur Flask : compresse les réponses textuelles
+    (JSON des callbacks, page, assets) en brotli si disponible, sinon en gzip,
+    selon ce qu'accepte le navigateur.
+    """
+    if (response.direct_passthrough or response.status_code != 200
+            or "Content-Encoding" in response.headers or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        body, encoding = brotli.compress(data, quality=5), "br"
+    elif accepted["gzip"]:
+        body, encoding = gzip.compress(data, compresslevel=6), "gzip"
+    else:
+        return response
+
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
@@ -0,0 +1,227 @@
+# src/utils/refresh.py
+import os
+import threading
+
+import pandas as pd
+
+from config import HISTORICAL_YEARS, REFRESH_INTERVAL_SECONDS, SHARED_SNAPSHOT, SNAPSHOT_POLL_SECONDS
+from src.utils.aggregates import build_cube
+from src.utils.common_functions import try_file_lock
+from src.utils.country_reference import get_country_reference
+from src.utils.data_loader import (
+    load_current_countries_data, load_current_continents_data, load_historical_year_data,
+    export_continent_csv, read_cached_dataset, data_version
+)
+from src.utils.get_data import run_parallel
+from src.utils.metrics import timed
+from src.utils.historical import get_timeline_index, load_timeline, local_timeline_index, set_shared_timeline_index
+from src.utils.snapshot import (
+    SNAPSHOT_DIR, header_mtime, map_snapshot, map_timeline_index, publish_snapshot, read_header,
+    shared_snapshot_available
+)
+
+# Snapshot courant : (dataset, année) -> (version, DataFrame).
+# Il n'est jamais modifié en place : chaque rafraîchissement construit un
+# nouveau dict puis remplace la référence (échange atomique).
+_snapshot = {}
+# Périodes prêtes pour les callbacks : année -> (version, pays, cube d'agrégats).
+# Une entrée n'est jamais modifiée : un callback la lit une seule fois et
+# travaille sur des données cohérentes même si un rafraîchissement la remplace.
+_periods = {}
+_refresh_lock = threading.Lock()
+_stop_event = threading.Event()
+_thread = None
+
+# Snapshot partagé entre workers : un seul "éditeur" (verrou tenu tant que
+# le processus vit) rafraîchit et publie, les autres mappent sa publication
+_publisher_lock = None
+_shared_seen = {"mtime": None, "version": None}
+
+
+def _keys():
+    years = HISTORICAL_YEARS + ["all"]
+    return [(dataset, year) for dataset in ("countries", "continents") for year in years]
+
+
+def _loader(dataset, year):
+    if dataset == "countries":
+        return load_current_countries_data if year == "all" else lambda: load_historical_year_data(year)
+    return load_current_continents_data if year == "all" else lambda: export_continent_csv(year)
+
+
+@timed("aggregates")
+def _materialize(snapshot):
+    """
+    Entrées des périodes du snapshot avec leurs agrégats ; un cube dont les
+    deux jeux de données n'ont pas changé est repris tel quel.
+    """
+    periods = {}
+    for year in HISTORICAL_YEARS + ["all"]:
+        countries = snapshot.get(("countries", year), (None, pd.DataFrame()))
+        continents = snapshot.get(("continents", year), (None, pd.DataFrame()))
+        version = f"{countries[0]}|{continents[0]}"
+        previous = _periods.get(year)
+        if previous is not None and previous[0] == version:
+            cube = previous[2]
+        else:
+            cube = build_cube(countries[1], continents[1])
+        periods[year] = (version, countries[1], cube)
+    return periods
+
+
+def _swap(snapshot):
+    """Publie un nouveau snapshot et ses agrégats (échange atomique des références)"""
+    global _snapshot, _periods
+    periods = _materialize(snapshot)
+    _snapshot, _periods = snapshot, periods
+
+
+def load_snapshot_from_disk():
+    """Snapshot initial depuis les fichiers déjà présents (même expirés), sans réseau"""
+    snapshot = {}
+    for dataset, year in _keys():
+        version = data_version(dataset, year)
+        snapshot[(dataset, year)] = (version, read_cached_dataset(dataset, year))
+    _swap(snapshot)
+    return snapshot
+
+
+@timed("refresh")
+def refresh_snapshot():
+    """
+    Rafraîchit la chaîne raw -> cleaned (API uniquement si le cache TTL a
+    expiré) puis publie le nouveau snapshot d'un coup.
+    Une erreur sur un jeu de données conserve sa version précédente.
+    Les chaînes indépendantes (données actuelles, historique) tournent en
+    parallèle ; les continents sont agrégés depuis les pays de la même
+    période, et les années historiques partagent la même timeline : chaque
+    chaîne reste donc séquentielle.
+    L'historique résout ses pays par la référence construite depuis
+    /countries : sa chaîne télécharge la timeline en parallèle, puis attend
+    la chaîne des données actuelles avant de découper les années.
+    """
+    reference_ready = threading.Event()
+
+    def chain(keys, prepare=None):
+        def run():
+            results = {}
+            if prepare is not None:
+                try:
+                    prepare()
+                except Exception as e:
+                    # Années précédentes conservées : rien n'est écrit sans référence pays
+                    print(f"Erreur rafraîchissement historique: {e}")
+                    return results
+            for dataset, year in keys:
+                try:
+                    df = _loader(dataset, year)()
+                    # version lue après le chargement : le fichier vient d'être (ré)écrit
+                    results[(dataset, year)] = (data_version(dataset, year), df)
+                except Exception as e:
+                    print(f"Erreur rafraîchissement {dataset} {year}: {e}")
+                finally:
+                    if (dataset, year) == ("countries", "all"):
+                        reference_ready.set()
+            return results
+        return run
+
+    def prepare_historical():
+        load_timeline()
+        reference_ready.wait()
+        get_country_reference()  # lève si /countries n'a jamais été reçu
+
+    historical = [(dataset, year) for year in HISTORICAL_YEARS for dataset in ("countries", "continents")]
+    chains = [chain([("countries", "all"), ("continents", "all")]), chain(historical, prepare_historical)]
+
+    with _refresh_lock:
+        snapshot = dict(_snapshot)
+        for results in run_parallel(chains):
+            if isinstance(results, dict):
+                snapshot.update(results)
+        _swap(snapshot)
+    return snapshot
+
+
+def _shared_mode():
+    return SHARED_SNAPSHOT and shared_snapshot_available()
+
+
+def _is_publisher():
+    global _publisher_lock
+    if _publisher_lock is None:
+        _publisher_lock = try_file_lock(os.path.join(SNAPSHOT_DIR, "publisher"))
+    return _publisher_lock is not None
+
+
+def sync_shared_snapshot():
+    """
+    Mappe le snapshot publié (tables et index de la timeline) s'il a changé
+    depuis la dernière vérification. L'index n'est construit que par l'éditeur.
+    """
+    mtime = header_mtime()
+    if mtime is None or mtime == _shared_seen["mtime"]:
+        return False
+    header = read_header()
+    if header.get("version") != _shared_seen["version"]:
+        _swap(map_snapshot(header))
+        set_shared_timeline_index(map_timeline_index(header))
+    _shared_seen.update(mtime=mtime, version=header.get("version"))
+    return True
+
+
+def get_period(year):
+    """
+    (version, DataFrame des pays, cube d'agrégats) d'une période, en une seule
+    lecture et sans jamais d'appel réseau. Un callback utilise cette entrée
+    pour tout son travail (figures, cache, Patch) : elle ne mélange jamais
+    deux rafraîchissements. (None, DataFrame vide, None) avant le premier snapshot.
+    """
+    return _periods.get(year, (None, pd.DataFrame(), None))
+
+
+def _tick():
+    """Un tour du scheduler ; renvoie le délai avant le suivant"""
+    if not _shared_mode():
+        refresh_snapshot()
+        return None
+    if _is_publisher():
+        publish_snapshot(refresh_snapshot(), local_timeline_index())
+        sync_shared_snapshot()
+        return None
+    sync_shared_snapshot()
+    return SNAPSHOT_POLL_SECONDS
+
+
+def _run(interval):
+    while not _stop_event.is_set():
+        try:
+            delay = _tick()
+            get_timeline_index()  # index du curseur de dates prêt avant le premier callback
+        except Exception as e:
+            print(f"Erreur rafraîchissement: {e}")
+            delay = None
+        _stop_event.wait(delay or interval)
+
+
+def start_refresh_scheduler(interval=REFRESH_INTERVAL_SECONDS):
+    """
+    Charge le snapshot disque puis lance le thread de rafraîchissement en
+    arrière-plan (idempotent : un seul thread par processus).
+    """
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return _thread
+    if _shared_mode():
+        set_shared_timeline_index(None)  # l'index ne vient que du snapshot publié, jamais du store local
+    if not _snapshot and not (_shared_mode() and sync_shared_snapshot()):
+        load_snapshot_from_disk()
+    _stop_event.clear()
+    _thread = threading.Thread(target=_run, args=(interval,), name="data-refresh", daemon=True)
+    _thread.start()
+    return _thread
+
+
+def stop_refresh_scheduler(timeout=None):
+    _stop_event.set()
+    if _thread is not None:
+        _thread.join(timeout)
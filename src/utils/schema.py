@@ -0,0 +1,68 @@
+# src/utils/schema.py
+import numpy as np
+import pandas as pd
+
+# Colonnes texte très répétées : codées en catégories (un dictionnaire + des codes entiers)
+CATEGORY_COLUMNS = ["country", "province", "iso3", "continent"]
+# Colonnes décimales où la simple précision suffit (coordonnées, ratios)
+FLOAT32_COLUMNS = ["lat", "long", "casesPerOneMillion"]
+
+
+def _int_dtype(values):
+    """int32 si les valeurs y tiennent (différences comprises), int64 sinon"""
+    info = np.iinfo(np.int32)
+    if len(values) == 0 or (values.min() >= info.min // 2 and values.max() <= info.max // 2):
+        return np.int32
+    return np.int64
+
+
+def compact(df) -> pd.DataFrame:
+    """
+    Types compacts communs à toutes les tables pays (actuelles, historiques,
+    timeline, continents) : catégories pour les noms et codes, entiers
+    réduits à int32 quand c'est possible, float32 pour les coordonnées.
+    Renvoie un nouveau DataFrame, df n'est pas modifié.
+    """
+    df = df.copy()
+    for col in df.columns:
+        values = df[col]
+        if col in CATEGORY_COLUMNS:
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                df[col] = values.astype("category")
+        elif pd.api.types.is_integer_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+            df[col] = values.astype(_int_dtype(values.to_numpy()))
+        elif col in FLOAT32_COLUMNS and pd.api.types.is_float_dtype(values.dtype):
+            df[col] = values.astype(np.float32)
+    return df
+
+
+def dense_ids(df, keys):
+    """
+    Identifiant entier dense (0..n-1, ordre d'apparition) de chaque ligne
+    selon les colonnes `keys`, et la table des clés distinctes dans cet ordre.
+    """
+    ids = df.groupby(keys, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+    first = np.unique(ids, return_index=True)[1]
+    return ids, df[keys].iloc[first].reset_index(drop=True)
+
+
+def timeline_arrays(timeline, metrics):
+    """
+    Timeline longue -> tableaux 2-D NumPy (série × jour) par métrique.
+    Une série est un couple (pays, province) repéré par son identifiant
+    dense ; les jours sans valeur valent NaN.
+    Renvoie (séries, dates, {métrique: grille}).
+    """
+    ids, series = dense_ids(timeline, ["country", "province"])
+
+    days = timeline["date"].to_numpy().astype("datetime64[D]")
+    first_day = days.min()
+    offsets = (days - first_day).astype(np.int64)
+    dates = first_day + np.arange(int(offsets.max()) + 1)
+
+    grids = {}
+    for m in metrics:
+        grid = np.full((len(series), len(dates)), np.nan)
+        grid[ids, offsets] = timeline[m].to_numpy()
+        grids[m] = grid
+    return series, dates, grids
@@ -0,0 +1,164 @@
+# src/utils/snapshot.py
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from src.utils.common_functions import atomic_path, file_lock
+
+try:
+    import pyarrow as pa
+except ImportError:  # pas de snapshot partagé sans pyarrow
+    pa = None
+
+SNAPSHOT_DIR = os.path.join("data", "snapshot")
+HEADER_PATH = os.path.join(SNAPSHOT_DIR, "current.json")
+KEEP_VERSIONS = 2  # l'ancienne version reste lisible le temps que les workers basculent
+INDEX_DIR = "timeline_index"
+INDEX_GROUPS = ["values", "continent_values", "totals", "top"]
+
+
+def snapshot_token(snapshot, index_version=None):
+    """Version globale du snapshot, dérivée des versions de chaque table et de l'index de la timeline"""
+    parts = sorted((f"{dataset}|{year}", str(version)) for (dataset, year), (version, _) in snapshot.items())
+    parts.append(("timeline_index", str(index_version)))
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def read_header():
+    """En-tête du snapshot publié ({} s'il n'y en a pas encore)"""
+    if not os.path.exists(HEADER_PATH):
+        return {}
+    with open(HEADER_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def header_mtime():
+    return os.path.getmtime(HEADER_PATH) if os.path.exists(HEADER_PATH) else None
+
+
+def _write_arrow(df, path):
+    _write_table(pa.Table.from_pandas(df, preserve_index=False), path)
+
+
+def _write_table(table, path):
+    with atomic_path(path) as tmp_path:
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+
+def _write_tensor(array, path):
+    with atomic_path(path) as tmp_path:
+        with pa.OSFile(tmp_path, "wb") as sink:
+            pa.ipc.write_tensor(pa.Tensor.from_numpy(np.ascontiguousarray(array)), sink)
+
+
+def _publish_index(index, directory):
+    """
+    Écrit les tableaux de l'index de la timeline (un tenseur Arrow par grille)
+    et ses libellés (pays, continents) ; renvoie leur description pour l'en-tête.
+    """
+    directory = os.path.join(directory, INDEX_DIR)
+    arrays = {"dates": index["dates"].astype("datetime64[D]").view(np.int64)}
+    for group in INDEX_GROUPS:
+        arrays.update({f"{group}.{m}": array for m, array in index[group].items()})
+
+    files = {}
+    for name, array in arrays.items():
+        files[name] = f"{name}.tensor"
+        _write_tensor(array, os.path.join(directory, files[name]))
+    _write_arrow(index["series"], os.path.join(directory, "series.arrow"))
+    _write_table(pa.table({"continent": [str(c) for c in index["continents"]]}),
+                 os.path.join(directory, "continents.arrow"))
+    return {"version": index["version"], "arrays": files}
+
+
+def publish_snapshot(snapshot, index=None):
+    """
+    Écrit le snapshot une seule fois dans des fichiers Arrow non compressés
+    (data/snapshot/<version>/), avec l'index de la timeline s'il est fourni,
+    puis bascule l'en-tête current.json.
+    Ne fait rien si cette version est déjà publiée (par ce worker ou un autre).
+    """
+    token = snapshot_token(snapshot, index["version"] if index is not None else None)
+    with file_lock(HEADER_PATH):
+        if read_header().get("version") == token:
+            return token
+
+        directory = os.path.join(SNAPSHOT_DIR, token)
+        tables = {}
+        for (dataset, year), (version, df) in snapshot.items():
+            filename = f"{dataset}_{year}.arrow"
+            _write_arrow(df, os.path.join(directory, filename))
+            tables[f"{dataset}|{year}"] = {"file": filename, "version": version}
+
+        header = {"version": token, "tables": tables}
+        if index is not None:
+            header["timeline_index"] = _publish_index(index, directory)
+
+        with atomic_path(HEADER_PATH) as tmp_path:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(header, f)
+
+        _remove_old_versions(keep=token)
+    return token
+
+
+def _remove_old_versions(keep):
+    versions = [d for d in os.listdir(SNAPSHOT_DIR) if os.path.isdir(os.path.join(SNAPSHOT_DIR, d))]
+    versions.sort(key=lambda d: os.path.getmtime(os.path.join(SNAPSHOT_DIR, d)), reverse=True)
+    old = [d for d in versions if d != keep][KEEP_VERSIONS - 1:]
+    for d in old:
+        shutil.rmtree(os.path.join(SNAPSHOT_DIR, d), ignore_errors=True)
+
+
+def map_snapshot(header):
+    """
+    Mappe en mémoire les tables d'un snapshot publié : (dataset, année) -> (version, DataFrame).
+    Les colonnes restent adossées au fichier mappé (pages partagées entre workers).
+    """
+    directory = os.path.join(SNAPSHOT_DIR, header["version"])
+    snapshot = {}
+    for key, info in header["tables"].items():
+        dataset, year = key.split("|")
+        year = year if year == "all" else int(year)
+        source = pa.memory_map(os.path.join(directory, info["file"]), "r")
+        table = pa.ipc.open_file(source).read_all()
+        snapshot[(dataset, year)] = (info["version"], table.to_pandas(split_blocks=True))
+    return snapshot
+
+
+def _read_table(path):
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def map_timeline_index(header):
+    """
+    Index de la timeline publié avec le snapshot, ou None s'il n'y en a pas.
+    Les grilles sont des vues en lecture seule sur les fichiers mappés : une
+    seule copie en mémoire, partagée par tous les workers.
+    """
+    info = header.get("timeline_index")
+    if info is None:
+        return None
+    directory = os.path.join(SNAPSHOT_DIR, header["version"], INDEX_DIR)
+    index = {group: {} for group in INDEX_GROUPS}
+    for name, filename in info["arrays"].items():
+        array = pa.ipc.read_tensor(pa.memory_map(os.path.join(directory, filename), "r")).to_numpy()
+        if name == "dates":
+            index["dates"] = array.view("datetime64[D]")
+        else:
+            group, metric = name.split(".", 1)
+            index[group][metric] = array
+    index["series"] = _read_table(os.path.join(directory, "series.arrow")).to_pandas()
+    index["continents"] = pd.Index(_read_table(os.path.join(directory, "continents.arrow"))["continent"].to_pylist())
+    index["version"] = info["version"]
+    return index
+
+
+def shared_snapshot_available():
+    return pa is not None
@@ -0,0 +1,75 @@
+# src/utils/storage.py
+import os
+
+import pandas as pd
+
+from config import STORAGE_FORMAT
+from src.utils.common_functions import atomic_path
+from src.utils.metrics import timed
+from src.utils.schema import compact
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow absent : on retombe sur le CSV
+    feather = None
+
+EXTENSIONS = {"feather": ".feather", "csv": ".csv"}
+
+
+def storage_format():
+    if STORAGE_FORMAT == "feather" and feather is None:
+        return "csv"
+    return STORAGE_FORMAT
+
+
+def table_path(name):
+    """
+    Fichier réel d'une table de data/cleaned (name est donné sans extension).
+    Si la table n'existe pas encore dans le format courant, on utilise
+    l'éventuel CSV existant (ancien cache ou export) jusqu'à la prochaine écriture.
+    """
+    path = name + EXTENSIONS[storage_format()]
+    if not os.path.exists(path) and os.path.exists(name + ".csv"):
+        return name + ".csv"
+    return path
+
+
+def table_exists(name):
+    return os.path.exists(table_path(name))
+
+
+@timed("read_table")
+def read_table(name, columns=None) -> pd.DataFrame:
+    """
+    Lit une table. En feather, la lecture est typée (catégories et entiers
+    réduits conservés), mappée en mémoire et ne charge que les colonnes
+    demandées ; un CSV est retypé par src/utils/schema.py.
+    """
+    path = table_path(name)
+    if path.endswith(".feather"):
+        return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+    return compact(pd.read_csv(path, usecols=columns, low_memory=False))
+
+
+@timed("write_table")
+def write_table(df, name):
+    """
+    Écrit une table dans le format courant (non compressé : mappable en mémoire).
+    Écriture dans un fichier temporaire puis renommage atomique.
+    """
+    path = name + EXTENSIONS[storage_format()]
+    with atomic_path(path) as tmp_path:
+        if path.endswith(".feather"):
+            feather.write_feather(df.reset_index(drop=True), tmp_path, compression="uncompressed")
+        else:
+            df.to_csv(tmp_path, index=False, encoding="utf-8")
+    return path
+
+
+def export_csv(name, dest=None):
+    """Export CSV d'une table (le CSV n'est plus le format de travail)"""
+    dest = dest or name + ".csv"
+    df = read_table(name)
+    with atomic_path(dest) as tmp_path:
+        df.to_csv(tmp_path, index=False, encoding="utf-8")
+    return dest
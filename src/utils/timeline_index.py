@@ -0,0 +1,164 @@
+# src/utils/timeline_index.py
+import numpy as np
+import pandas as pd
+
+from src.utils.aggregates import TOP_N
+from src.utils.derived import DERIVED_METRICS, derive
+from src.utils.schema import timeline_arrays
+
+METRICS = ["cases", "deaths", "recovered"]
+ALL_METRICS = METRICS + ["active"]
+INDEXED_METRICS = ALL_METRICS + list(DERIVED_METRICS)
+
+
+def build_timeline_index(timeline, reference):
+    """
+    Index précalculé sur la timeline : une grille pays × jour par métrique,
+    complétée vers l'avant (valeur connue la plus récente), et la même grille
+    déjà sommée par continent, les totaux mondiaux et le classement top N de
+    chaque jour. Une date se résout ensuite par une recherche dichotomique
+    sur les jours puis une simple lecture de colonne.
+    Les séries sont résolues par la référence pays (src/utils/country_reference.py,
+    indexée par nom) : nom canonique, ISO3, continent et population. Les
+    provinces d'un même pays sont sommées en une seule série par pays.
+    Les métriques dérivées (src/utils/derived.py) sont calculées ici, une fois
+    par version de la timeline, pour les pays, les continents et le total mondial.
+    """
+    if timeline.empty:
+        return None
+    series, dates, grids = timeline_arrays(timeline, METRICS)
+
+    pos = reference.index.get_indexer(series["country"].astype(str))
+    found = pos >= 0
+    if not found.any():
+        return None
+    pos = pos[found]
+    group, countries = pd.factorize(reference["country"].to_numpy()[pos])
+    first = pos[np.unique(group, return_index=True)[1]]  # ligne de référence de chaque pays
+    series = pd.DataFrame({"country": countries, "iso3": reference["iso3"].to_numpy()[first]})
+    continent = reference["continent"].to_numpy()[first]
+    population = (reference["population"].to_numpy(dtype="float64")[first]
+                  if "population" in reference else np.full(len(series), np.nan))
+    n_days = len(dates)
+
+    values = {}
+    for m in METRICS:
+        grid = grids[m][found]
+        # Complétion vers l'avant : pour chaque case, indice de la dernière valeur connue
+        known = np.where(np.isnan(grid), 0, np.arange(n_days))
+        np.maximum.accumulate(known, axis=1, out=known)
+        values[m] = _sum_rows(grid[np.arange(len(grid))[:, None], known], group)
+    values["active"] = values["cases"] - values["deaths"] - values["recovered"]
+
+    codes, continents = pd.factorize(continent)
+    onehot = np.zeros((len(continents), len(series)))
+    onehot[codes[codes >= 0], np.flatnonzero(codes >= 0)] = 1
+    continent_values = {m: onehot @ np.nan_to_num(values[m]) for m in ALL_METRICS}
+
+    totals = {m: np.nansum(values[m], axis=0, keepdims=True) for m in ALL_METRICS}
+    values.update(derive(values, population))
+    continent_values.update(derive(continent_values, onehot @ np.nan_to_num(population)))
+    totals.update(derive(totals, np.array([np.nansum(population)])))
+    totals = {m: grid[0] for m, grid in totals.items()}
+
+    top = {m: _top_rows(values[m]) for m in INDEXED_METRICS}
+
+    return {
+        "dates": dates,
+        "series": series,
+        "values": values,
+        "continents": pd.Index(continents),
+        "continent_values": continent_values,
+        "totals": totals,
+        "top": top,
+    }
+
+
+def _sum_rows(grid, group):
+    """
+    Somme les lignes d'une grille par groupe (codes 0..n-1, cf. pd.factorize) ;
+    une case reste NaN si aucune ligne du groupe n'y a de valeur.
+    """
+    order = np.argsort(group, kind="stable")
+    starts = np.flatnonzero(np.r_[True, np.diff(group[order]) != 0])
+    rows = grid[order]
+    sums = np.add.reduceat(np.nan_to_num(rows), starts, axis=0)
+    sums[np.add.reduceat(~np.isnan(rows), starts, axis=0) == 0] = np.nan
+    return sums
+
+
+def _top_rows(values, n=TOP_N):
+    """
+    Classement par jour : indices (int32) des n séries les plus touchées de
+    chaque colonne, par ordre décroissant. argpartition isole les n lignes
+    sans trier toute la grille ; seules ces n lignes sont ensuite triées.
+    """
+    keys = -np.nan_to_num(values, nan=-np.inf)
+    if len(keys) > n:
+        rows = np.sort(np.argpartition(keys, n - 1, axis=0)[:n], axis=0)  # à égalité, ordre des séries
+    else:
+        rows = np.broadcast_to(np.arange(len(keys))[:, None], keys.shape)
+    order = np.argsort(np.take_along_axis(keys, rows, axis=0), axis=0, kind="stable")
+    return np.take_along_axis(rows, order, axis=0).astype(np.int32)
+
+
+def date_position(index, date):
+    """Colonne de la dernière date indexée <= date (-1 si avant le début)"""
+    return int(np.searchsorted(index["dates"], np.datetime64(pd.Timestamp(date), "D"), side="right")) - 1
+
+
+def countries_at(index, date, derived=()) -> pd.DataFrame:
+    """
+    Snapshot par pays à n'importe quelle date, sans réseau ni lecture de fichier.
+    derived : métriques dérivées à ajouter aux quatre cumuls.
+    """
+    j = date_position(index, date)
+    if j < 0:
+        return pd.DataFrame()
+    cases = index["values"]["cases"][:, j]
+    present = ~np.isnan(cases)
+
+    df = index["series"][present].copy()
+    for m in ALL_METRICS:
+        df[m] = index["values"][m][present, j].astype(np.int64)
+    for m in derived:
+        df[m] = index["values"][m][present, j]
+    return df[["country"] + ALL_METRICS + ["iso3"] + list(derived)].reset_index(drop=True)
+
+
+def continents_at(index, date, derived=()) -> pd.DataFrame:
+    """Snapshot par continent à n'importe quelle date (sommes déjà précalculées)"""
+    j = date_position(index, date)
+    if j < 0 or len(index["continents"]) == 0:
+        return pd.DataFrame()
+    df = pd.DataFrame({"continent": index["continents"]})
+    for m in ALL_METRICS:
+        df[m] = index["continent_values"][m][:, j].astype(np.int64)
+    for m in derived:
+        df[m] = index["continent_values"][m][:, j]
+    return df.sort_values("continent").reset_index(drop=True)
+
+
+def cube_at(index, date, derived=()):
+    """
+    Agrégats précalculés d'une date (même forme que aggregates.build_cube) ;
+    les classements et continents des métriques `derived` sont ajoutés.
+    """
+    j = date_position(index, date)
+    if j < 0:
+        return None
+    top = {}
+    for m in ALL_METRICS + list(derived):
+        rows = index["top"][m][:, j]
+        rows = rows[~np.isnan(index["values"][m][rows, j])][::-1]
+        values = index["values"][m][rows, j]
+        top[m] = pd.DataFrame({
+            "country": index["series"]["country"].to_numpy()[rows],
+            m: values.astype(np.int64) if m in ALL_METRICS else values,
+        })
+    return {
+        "totals": {m: int(index["totals"][m][j]) if m in ALL_METRICS else float(index["totals"][m][j])
+                   for m in INDEXED_METRICS},
+        "top": top,
+        "continents": continents_at(index, date, derived),
+    }
@@ -0,0 +1,46 @@
+# tests/conftest.py
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# Les modules du projet s'importent depuis la racine du dépôt (config, src.utils...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.timeline_index import build_timeline_index  # noqa: E402
+
+DATES = pd.to_datetime(["2021-01-01", "2021-01-02", "2021-01-03"])
+
+
+def _reference():
+    reference = pd.DataFrame({
+        "name": ["France", "Canada", "Japan"],
+        "country": ["France", "Canada", "Japan"],
+        "iso3": ["FRA", "CAN", "JPN"],
+        "continent": ["Europe", "North America", "Asia"],
+        "population": [65_000_000, 38_000_000, 125_000_000],
+    })
+    return reference.set_index("name")
+
+
+def _timeline(rows):
+    """rows : (pays, province, [cumul des cas par jour])"""
+    records = [
+        {"country": country, "province": province, "date": date, "cases": cases, "deaths": 0, "recovered": 0}
+        for country, province, values in rows
+        for date, cases in zip(DATES, values)
+    ]
+    return pd.DataFrame(records)
+
+
+@pytest.fixture
+def index():
+    # Canada n'existe que par provinces ; France a une série principale et une province
+    return build_timeline_index(_timeline([
+        ("Canada", "Ontario", [50, 60, 70]),
+        ("Canada", "Quebec", [40, 45, 47]),
+        ("France", None, [100, 110, 130]),
+        ("France", "Martinique", [5, 6, 8]),
+        ("Japan", None, [10, 20, 30]),
+    ]), _reference())
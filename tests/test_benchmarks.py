@@ -0,0 +1,42 @@
+# tests/test_benchmarks.py
+import json
+import os
+import subprocess
+import sys
+import urllib.request
+
+from benchmarks.stub_server import start_stub
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_stub_serves_recorded_api():
+    server, api, url = start_stub()
+    try:
+        with urllib.request.urlopen(f"{url}/countries") as response:
+            countries = json.load(response)
+    finally:
+        server.shutdown()
+    assert countries and "country" in countries[0]
+    assert len(api.calls) == 1
+
+
+def test_run_benchmarks_single_short_iteration(tmp_path):
+    # Processus séparé : main.py crée l'application à l'import et COVID_API_URL doit précéder tout import du projet
+    output = tmp_path / "result.json"
+    completed = subprocess.run(
+        [sys.executable, os.path.join(ROOT, "benchmarks", "run_benchmarks.py"),
+         "--users", "1", "--duration", "0.5", "--repeat", "1", "--output", str(output)],
+        cwd=ROOT, capture_output=True, text=True, timeout=300
+    )
+    assert completed.returncode == 0, completed.stderr
+
+    result = json.loads(output.read_text(encoding="utf-8"))
+    assert result["pipeline"]["api_calls"] > 0
+    assert result["callbacks"]
+    # Le callback du dashboard, pas celui du curseur de dates
+    assert all({"world-map", "figure-state"} <= set(c["outputs"]) for c in result["callbacks"])
+    sizes = {c["metric"]: c["response_bytes"] for c in result["callbacks"] if c["period"] == "all"}
+    assert len(set(sizes.values())) > 1
+    assert [load["users"] for load in result["load"]] == [1]
+    assert result["load"][0]["errors"] == 0
@@ -0,0 +1,27 @@
+# tests/test_country_reference.py
+import pandas as pd
+
+from src.utils.country_reference import resolve_countries, sum_by_country
+
+
+def _reference():
+    reference = pd.DataFrame({
+        "name": ["France", "Canada", "US", "USA"],
+        "country": ["France", "Canada", "USA", "USA"],
+        "iso3": ["FRA", "CAN", "USA", "USA"],
+    })
+    return reference.set_index("name")
+
+
+def test_provinces_summed_once_per_country():
+    df = pd.DataFrame({
+        "country": ["Canada", "Canada", "France", "France", "US", "Diamond Princess"],
+        "cases": [50, 40, 100, 5, 1000, 7],
+        "deaths": [1, 2, 3, 0, 10, 0],
+    })
+    df = sum_by_country(resolve_countries(df, reference=_reference()), ["cases", "deaths"])
+
+    assert list(df["country"].astype(str)) == ["Canada", "France", "USA"]
+    assert list(df["cases"]) == [90, 105, 1000]
+    assert list(df["deaths"]) == [3, 3, 10]
+    assert list(df["iso3"].astype(str)) == ["CAN", "FRA", "USA"]
@@ -0,0 +1,37 @@
+# tests/test_data_loader.py
+import os
+
+import pandas as pd
+import pytest
+
+from src.utils import historical
+from src.utils.data_loader import load_historical_year_data
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.join("data", "cleaned"))
+    return tmp_path
+
+
+def _cached_year(year):
+    return [f for f in os.listdir(os.path.join("data", "cleaned"))
+            if f.startswith(f"historical_{year}.") and not f.endswith(".lock")]
+
+
+def test_year_not_cached_without_country_reference(workdir, monkeypatch):
+    def missing():
+        raise FileNotFoundError("data/raw/rawdata.json")
+    monkeypatch.setattr(historical, "get_country_reference", missing)
+
+    with pytest.raises(FileNotFoundError):
+        load_historical_year_data(2021)
+    assert not _cached_year(2021)
+
+
+def test_empty_year_is_not_cached(workdir, monkeypatch):
+    monkeypatch.setattr(historical, "fetch_historical_countries", lambda year: pd.DataFrame())
+
+    assert load_historical_year_data(2021).empty
+    assert not _cached_year(2021)
@@ -0,0 +1,35 @@
+# tests/test_historical.py
+import os
+
+import pandas as pd
+import pytest
+
+from src.utils import historical
+from src.utils.storage import table_path
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.join("data", "cleaned"))
+    historical.save_timeline(pd.DataFrame({
+        "country": ["France"], "province": [None], "date": pd.to_datetime(["2021-01-01"]),
+        "cases": [10], "deaths": [1], "recovered": [0],
+    }))
+    os.utime(table_path(historical.TIMELINE_PATH), (0, 0))  # TTL expiré
+
+    # Relecture et réécriture enregistrées (une exception serait rattrapée par le repli sur le store)
+    calls = []
+    monkeypatch.setattr(historical, "download_timeline", lambda lastdays="all": False)
+    monkeypatch.setattr(historical, "read_raw_timeline", lambda *args: calls.append("read"))
+    monkeypatch.setattr(historical, "write_table", lambda *args: calls.append("write"))
+    return calls
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_not_modified_keeps_store(store, monkeypatch, incremental):
+    monkeypatch.setattr(historical, "HISTORICAL_INCREMENTAL_REFRESH", incremental)
+    timeline = historical.load_timeline()
+    assert store == []
+    assert len(timeline) == 1
+    assert os.path.getmtime(table_path(historical.TIMELINE_PATH)) > 0  # repart pour un TTL
@@ -0,0 +1,25 @@
+# tests/test_metrics.py
+from flask import Flask
+
+from src.utils import metrics
+from src.utils.payload import compress_response
+
+
+def test_response_size_is_measured_after_compression(monkeypatch):
+    monkeypatch.setattr(metrics, "_sizes", {})
+    server = Flask(__name__)
+    server.after_request(metrics.observe_response)
+    server.after_request(compress_response)
+    server.add_url_rule("/data", "data", lambda: {"values": list(range(2000))}, methods=["GET", "POST"])
+    client = server.test_client()
+
+    response = client.get("/data", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert f'covid_response_bytes_sum{{route="data",output=""}} {len(response.data)}' in metrics.render_metrics()
+
+    # Requêtes de callback : une série par sortie, pas une seule pour /_dash-update-component
+    figures = client.post("/data", json={"output": "..world-map.figure.."}, headers={"Accept-Encoding": "gzip"})
+    client.post("/data", json={"output": "slider-poll.disabled"})
+    rendered = metrics.render_metrics()
+    assert f'covid_response_bytes_sum{{route="data",output="..world-map.figure.."}} {len(figures.data)}' in rendered
+    assert 'covid_response_bytes_count{route="data",output="slider-poll.disabled"} 1' in rendered
@@ -0,0 +1,29 @@
+# tests/test_payload.py
+import gzip
+import re
+
+import dash
+import pytest
+
+from src.utils.payload import compress_response
+
+
+@pytest.fixture
+def client():
+    app = dash.Dash(__name__)
+    app.layout = dash.html.Div()
+    app.server.after_request(compress_response)
+    return app.server.test_client()
+
+
+def test_component_suites_are_compressed(client):
+    page = client.get("/").get_data(as_text=True)
+    script = re.search(r'src="(/_dash-component-suites/[^"]+\.js)"', page).group(1)
+
+    response = client.get(script, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    plain = client.get(script)
+    assert "Content-Encoding" not in plain.headers
+    assert gzip.decompress(response.data) == plain.data
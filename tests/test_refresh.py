@@ -0,0 +1,36 @@
+# tests/test_refresh.py
+import pandas as pd
+
+from src.utils import refresh
+
+
+def _countries(cases):
+    return pd.DataFrame({"country": ["France", "Japan"], "iso3": ["FRA", "JPN"], "continent": ["Europe", "Asia"],
+                         "cases": cases, "deaths": [1, 2], "recovered": [0, 0], "active": cases})
+
+
+def _continents(cases):
+    return pd.DataFrame({"continent": ["Asia", "Europe"], "cases": cases, "deaths": [2, 1],
+                         "recovered": [0, 0], "active": cases})
+
+
+def test_period_entry_is_consistent_across_swaps(monkeypatch):
+    monkeypatch.setattr(refresh, "_snapshot", {})
+    monkeypatch.setattr(refresh, "_periods", {})
+    refresh._swap({("countries", "all"): (1.0, _countries([10, 20])), ("continents", "all"): (1.0, _continents([20, 10]))})
+    version, df, cube = refresh.get_period("all")
+
+    refresh._swap({("countries", "all"): (2.0, _countries([30, 40])), ("continents", "all"): (2.0, _continents([40, 30]))})
+    # L'entrée lue avant le rafraîchissement reste entière : version, pays et agrégats ensemble
+    assert version == "1.0|1.0"
+    assert df["cases"].sum() == cube["totals"]["cases"] == 30
+
+    version, df, cube = refresh.get_period("all")
+    assert version == "2.0|2.0"
+    assert df["cases"].sum() == cube["totals"]["cases"] == 70
+
+
+def test_period_before_first_snapshot(monkeypatch):
+    monkeypatch.setattr(refresh, "_periods", {})
+    version, df, cube = refresh.get_period(2021)
+    assert version is None and df.empty and cube is None
@@ -0,0 +1,35 @@
+# tests/test_snapshot.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.snapshot import map_timeline_index, publish_snapshot, read_header
+from src.utils.timeline_index import cube_at
+
+pytest.importorskip("pyarrow")
+
+
+def test_timeline_index_is_published_and_mapped(index, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    index["version"] = 1.0
+    publish_snapshot({}, index)
+    mapped = map_timeline_index(read_header())
+
+    assert mapped["version"] == 1.0
+    np.testing.assert_array_equal(mapped["dates"], index["dates"])
+    pd.testing.assert_frame_equal(mapped["series"], index["series"])
+    assert list(mapped["continents"]) == list(index["continents"])
+    for group in ("values", "continent_values", "totals", "top"):
+        for m, array in index[group].items():
+            assert mapped[group][m].dtype == array.dtype
+            np.testing.assert_array_equal(mapped[group][m], array)
+    # Vues sur le fichier mappé, pas de copie propre au worker
+    assert not mapped["values"]["cases"].flags.owndata
+
+    expected, cube = cube_at(index, "2021-01-03", ["new_cases"]), cube_at(mapped, "2021-01-03", ["new_cases"])
+    pd.testing.assert_series_equal(pd.Series(cube["totals"]), pd.Series(expected["totals"]))
+    pd.testing.assert_frame_equal(cube["top"]["new_cases"], expected["top"]["new_cases"])
+
+
+def test_no_index_in_header():
+    assert map_timeline_index({"version": "x", "tables": {}}) is None
@@ -0,0 +1,29 @@
+# tests/test_timeline_index.py
+import numpy as np
+import pytest
+
+from src.utils.timeline_index import countries_at, cube_at
+
+
+def test_provinces_are_summed_per_country(index):
+    df = countries_at(index, "2021-01-03", ["new_cases"])
+    assert df["country"].is_unique
+    row = df.set_index("country").loc["Canada"]
+    assert row["cases"] == 117
+    assert row["new_cases"] == 12
+
+
+def test_per_capita_for_provinces_only_country(index):
+    df = countries_at(index, "2021-01-03", ["cases_per_100k"]).set_index("country")
+    assert df.loc["Canada", "cases_per_100k"] == pytest.approx(117 / 38_000_000 * 100_000, rel=1e-5)
+    assert df.loc["France", "cases_per_100k"] == pytest.approx(138 / 65_000_000 * 100_000, rel=1e-5)
+
+
+def test_totals_and_ranking(index):
+    cube = cube_at(index, "2021-01-03", ["cases_per_100k"])
+    assert cube["totals"]["cases"] == 117 + 138 + 30
+    assert cube["totals"]["cases_per_100k"] == pytest.approx(285 / 228_000_000 * 100_000, rel=1e-5)
+    top = cube["top"]["cases"]
+    assert top["country"].is_unique
+    assert list(top["country"]) == ["Japan", "Canada", "France"]  # ordre croissant
+    assert np.isfinite(cube["top"]["cases_per_100k"]["cases_per_100k"]).all()